@@ -0,0 +1,134 @@
+"""
+MIT License
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Jan Nalivaika
+#
+# IG : @jannalivaika
+# YT : Jan Nalivaika
+# SC : @jannalivaika
+# LinkedIn : Jan Nalivaika
+# Mail : jan.nalivaika@siemens.com
+# Mail : nalivaika@outlook.de
+
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Decoding of the actions and exploration
+#
+# "extract_Actions()" and "Randomise_Action()" are called on every time step of every episode.
+# Both work on a single raw action-vector (action_dim) or on a batch (num_envs, action_dim) without Python loops.
+# The noise is taken from a block of pre-generated random numbers ("NoiseBlock").
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+
+
+def extract_Actions(Action_raw, ammount_of_products, ammount_of_machines):
+    """
+    # ##################################################################################################################
+    # Example:
+    # The raw action vector looks like this
+    # [0.2345 , 0.564 , 0.34 , 0.7653 , 0.456 , 0.4234 , 0.5345634 , 0.64356 , ............. ]
+    #
+    # At first the vector is subdivided into parts
+    # Every part of the raw vector is attributed to a product
+    #
+    #  Section for product 1      Section for product 2      Section for product 3
+    # [0.2345 , 0.564 , 0.34 ]  [0.7653 , 0.456 , 0.4234 ] [0.5345634 , 0.64356 , ............. ]
+    #
+    # Next the index of the maximum element is located
+    #
+    #  Section for product 1           Section for product 2            Section for product 3
+    # [0.2345 , 0.564 , 0.34 ]       [0.7653 , 0.456 , 0.4234 ]     [0.5345634 , 0.64356 , ............. ]
+    #       Max index = 1                   Max index = 0                     Max index = 1
+    #
+    # 1 is subtracted from the index to generate the applicable signal
+    #
+    # index 0 --> -1  == inject
+    # index 1 -->  0  == go to machine 0
+    # index 2 -->  1  == go to machine 1
+    # index 3 -->  2  == go to machine 2
+    # index 4 -->  3  == go to machine 3
+    # ...
+    #
+    # The subdivision is one reshape to (products, machines + 1), or (num_envs, products, machines + 1) for a batch,
+    # and all sections are decoded with one argmax.
+    # ##################################################################################################################
+    """
+    Action_raw = np.asarray(Action_raw)
+    sections = Action_raw.reshape(Action_raw.shape[:-1] + (ammount_of_products, ammount_of_machines + 1))
+    return sections.argmax(axis=-1) - 1
+
+
+class NoiseBlock:
+    # Standard-normal noise is generated in large blocks and handed out row by row,
+    # instead of one call of the random generator on every step.
+    # seed   of its own Generator (int, None or a "SeedSequence", see Streams.py)
+    def __init__(self, action_dim, block_size=4096, seed=None):
+        self.generator = np.random.default_rng(seed)
+        self.block = np.empty((block_size, action_dim))
+        self.position = block_size  # empty, filled with the first draw
+
+    def draw(self, rows):
+        if self.position + rows > len(self.block):
+            self.block = self.generator.standard_normal((max(len(self.block), rows), self.block.shape[1]))
+            self.position = 0
+        noise = self.block[self.position:self.position + rows]
+        self.position += rows
+        return noise
+
+
+def Randomise_Action(Action_raw, exploration_noise_max, exploration_noise_min, exploration_noise_decay, episode,
+                     noise_block=None):
+    """
+    # ##################################################################################################################
+    # To increase the chance of finding the global minimum a certain degree of exploration is needed
+    # To generate noise a vector is created to be added to the raw action-vector.
+    # The noise is vector as long as the raw action-vector
+    # The noise elements are normally distributed with the standard deviation exploration_noise_max
+    #
+    # Example:
+    # [0.213 , 0.2456 , 0.8434, ....]
+    #
+    # Every loop the range of the possible noise is decreased to allow the Agent to choose its own actions
+    # (once per call, also if a batch of raw action-vectors of many factories is randomised)
+    #
+    # With a "NoiseBlock" the noise is taken from pre-generated random numbers.
+    # ##################################################################################################################
+    """
+
+    if exploration_noise_max > exploration_noise_min:
+        # range is decreased
+        exploration_noise_max *= exploration_noise_decay
+    else:
+        exploration_noise_max = exploration_noise_min
+
+    # noise vector is created in the current range
+    Action_raw = np.asarray(Action_raw)
+    if noise_block is None:
+        noise = np.random.normal(0, exploration_noise_max, size=Action_raw.shape)
+    else:
+        rows = 1 if Action_raw.ndim == 1 else Action_raw.shape[0]
+        noise = noise_block.draw(rows).reshape(Action_raw.shape) * exploration_noise_max
+    # noise vector is added to the raw action vector
+    Action_raw = Action_raw + noise
+
+    return Action_raw, exploration_noise_max
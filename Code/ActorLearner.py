@@ -0,0 +1,288 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Actor/Learner training with multiple processes
+#
+# In the training loop of Trainer.py the simulation and the learning take turns, so only one core is used.
+# Here a pool of actor-processes simulates episodes with a copy of the actor-network and streams the transitions
+# to the learner (the main process). The learner owns the replay buffer, runs "TD3.update()" continuously
+# and regularly broadcasts the new actor-weights to the actor-processes.
+# Transitions are written into one shared-memory ring per actor-process (see SharedRing.py),
+# only a small summary of every episode goes through a queue.
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+import time  # time library to get time for benchmarking
+import logging  # level-gated output of the progress
+import queue  # for the exception of an empty queue
+import torch  # for the actor-network in the actor-processes
+import torch.multiprocessing as mp  # multiprocessing with shared-memory tensors
+from Agent import Actor  # importing Actor-Network from other file
+from Factory import Factory  # importing Factory-Class from other file
+from EventFactory import EventFactory  # importing event-driven Factory-Class from other file
+from SharedRing import TransitionRing  # importing shared-memory transport from other file
+from Actions import extract_Actions, Randomise_Action, NoiseBlock  # decoding of actions and exploration
+from Telemetry import Telemetry  # timings and throughput of the training
+from Streams import sequence, seed_generators  # seeds derived from one root seed
+
+logger = logging.getLogger(__name__)
+
+
+def actor_process(worker, factory_parameters, agent_parameters, exploration, shared_actor, version, lock, ring_name,
+                  ring_capacity, episodes, stop, seed):
+    """
+    # ##################################################################################################################
+    # Runs episodes like the training loop in Trainer.py until "stop" is set.
+    # The local actor-network is replaced by the shared one whenever the learner has published new weights.
+    # Every finished episode is written into the shared-memory ring, its summary is sent through "episodes".
+    # ##################################################################################################################
+    """
+    # every process gets its own random numbers (children of its seed) and only one thread
+    # (the processes are the parallelism)
+    factory_seed, noise_seed, global_seed = seed.spawn(3)
+    seed_generators(global_seed)
+    torch.set_num_threads(1)
+
+    WorkingTime, TravelTime, amount_of_products, max_timesteps, normalization, events = factory_parameters
+    state_dim, action_dim, max_action = agent_parameters
+    exploration_noise_max, exploration_noise_min, exploration_noise_decay = exploration
+    random_steps_before_takeover = 10
+
+    factory = (EventFactory if events else Factory)(WorkingTime, TravelTime, amount_of_products, max_timesteps,
+                                                    normalization=normalization, seed=factory_seed)
+    P, M = factory.amount_of_products, factory.amount_of_machines
+    noise_block = NoiseBlock(action_dim, seed=noise_seed)
+
+    actor = Actor(state_dim, action_dim, max_action)
+    local_version = -1
+
+    ring = TransitionRing(state_dim, action_dim, ring_capacity, name=ring_name)
+
+    # one episode is collected in these arrays
+    states = np.empty((max_timesteps, state_dim), dtype=np.float32)
+    actions = np.empty((max_timesteps, action_dim), dtype=np.float32)
+    rewards = np.empty(max_timesteps, dtype=np.float32)
+    next_states = np.empty((max_timesteps, state_dim), dtype=np.float32)
+    dones = np.empty(max_timesteps, dtype=np.float32)
+
+    while not stop.is_set():
+        start = time.time()
+
+        if version.value != local_version:
+            with lock:
+                actor.load_state_dict(shared_actor.state_dict())
+                local_version = version.value
+
+        factory.reset()
+        factory.random_start(random_steps_before_takeover)
+        done = factory.done[0]
+        step = 0
+        game_reward = 0
+        timings = np.zeros(3)  # seconds of simulate, encode, infer in this episode
+
+        while not done and factory.step_count[0] < max_timesteps:
+            tick = time.perf_counter()
+            states[step] = factory.GenerateState()
+            timings[1] += time.perf_counter() - tick
+
+            tick = time.perf_counter()
+            with torch.no_grad():
+                Action_raw = actor(torch.from_numpy(states[step:step + 1]))[0].numpy()
+            timings[2] += time.perf_counter() - tick
+
+            # Adding exploration
+            Action_raw, exploration_noise_max = Randomise_Action(Action_raw, exploration_noise_max,
+                                                                 exploration_noise_min, exploration_noise_decay, 0,
+                                                                 noise_block)
+
+            # Extracting actions
+            Action = extract_Actions(Action_raw, P, M)
+
+            tick = time.perf_counter()
+            step_reward, done = factory.step(Action)
+            timings[0] += time.perf_counter() - tick
+
+            actions[step] = Action_raw
+            rewards[step] = step_reward
+            tick = time.perf_counter()
+            next_states[step] = factory.GenerateState()
+            timings[1] += time.perf_counter() - tick
+            dones[step] = float(done)
+
+            step += 1
+            game_reward += step_reward
+
+        if not ring.put(states[:step], actions[:step], rewards[:step], next_states[:step], dones[:step], stop):
+            break
+        completed = int((factory.ProductDesign[0] == -1).sum())
+        episodes.put((worker, game_reward, step, exploration_noise_max, time.time() - start, completed,
+                      tuple(timings)))
+
+    ring.close()
+
+
+class ActorLearner:
+    """
+    # ##################################################################################################################
+    # num_actors            number of actor-processes
+    # updates_per_round     "TD3.update()"-iterations between two checks for new transitions
+    # broadcast_interval    the actor-weights are sent to the actor-processes every "broadcast_interval" updates
+    # ring_capacity         transitions in the shared-memory ring of every actor-process
+    # episode_log           "EpisodeLog" for the finished episodes (see EpisodeLog.py), None == no log
+    # checkpoint            "Checkpoint" written every 200 episodes (see Checkpoint.py), None == "TD3.save()"
+    # telemetry             "Telemetry" of the learner: buffer_add (draining the rings) and update (see Telemetry.py)
+    # events                the actor-processes use the event-driven factory (see EventFactory.py)
+    # seed                  root seed (int or "SeedSequence"), actor-process x gets its child x (see Streams.py)
+    #
+    # Continued training: "store" holds the rewards of the episodes so far, "episode" is the last episode of the
+    # checkpoint, the episodes are counted on from there.
+    # (The random generators of the actor-processes are not part of the checkpoint.)
+    #
+    # The factory is described by the same elements as "Factory()",
+    # the agent by the output of "Create_Agent_Parameters()" and "Create_Update_Parameters()" in Trainer.py.
+    # ##################################################################################################################
+    """
+
+    def __init__(self, Policy, replay_buffer, WorkingTime, TravelTime, amount_of_products, max_timesteps,
+                 normalization, agent_parameters, update_parameters, num_actors=4, updates_per_round=50,
+                 broadcast_interval=200, ring_capacity=4096, seed=0, episode_log=None, checkpoint=None,
+                 telemetry=None, events=False):
+        self.Policy = Policy
+        self.replay_buffer = replay_buffer
+        self.factory_parameters = (WorkingTime, TravelTime, amount_of_products, max_timesteps, normalization,
+                                   events)
+
+        lr, state_dim, action_dim, max_action, exploration_noise_max, exploration_noise_min, exploration_noise_decay = agent_parameters
+        self.agent_parameters = (state_dim, action_dim, max_action)
+        self.exploration = (exploration_noise_max, exploration_noise_min, exploration_noise_decay)
+        self.update_parameters = update_parameters  # batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay
+
+        self.num_actors = num_actors
+        self.updates_per_round = updates_per_round
+        self.broadcast_interval = broadcast_interval
+        self.ring_capacity = ring_capacity
+        self.seed = seed
+        self.episode_log = episode_log
+        self.checkpoint = checkpoint
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+
+        # The actor-processes are started fresh ("spawn"), they only import the modules they need
+        self.context = mp.get_context("spawn")
+
+        # actor-weights in shared memory, replaced by the learner and read by the actor-processes
+        self.shared_actor = Actor(*self.agent_parameters)
+        self.shared_actor.share_memory()
+        self.version = self.context.Value('i', 0)
+        self.lock = self.context.Lock()
+
+        self.store = []  # vector to store the rewards
+        self.episode = 0  # last finished episode
+        self.updates = 0
+
+    def broadcast(self):
+        # the current actor-weights are published to the actor-processes
+        with self.lock:
+            with torch.no_grad():
+                for shared, param in zip(self.shared_actor.parameters(), self.Policy.actor.parameters()):
+                    shared.copy_(param)
+            self.version.value += 1
+
+    def run(self, max_episodes):
+        self.broadcast()
+        state_dim, action_dim, max_action = self.agent_parameters
+        rings = [TransitionRing(state_dim, action_dim, self.ring_capacity, create=True) for _ in range(self.num_actors)]
+        episodes = self.context.Queue()
+        stop = self.context.Event()
+        # one child of the root seed per actor-process
+        seeds = sequence(self.seed).spawn(self.num_actors)
+
+        workers = [self.context.Process(target=actor_process,
+                                        args=(worker, self.factory_parameters, self.agent_parameters, self.exploration,
+                                              self.shared_actor, self.version, self.lock, rings[worker].name,
+                                              self.ring_capacity, episodes, stop, seeds[worker]),
+                                        daemon=True)
+                   for worker in range(self.num_actors)]
+        for worker in workers:
+            worker.start()
+
+        batch_size = self.update_parameters[0]
+        last_broadcast = 0
+        episode = self.episode
+
+        try:
+            while episode < max_episodes:
+                # the actor-processes only finish when "stop" is set, otherwise one of them crashed
+                for index, worker in enumerate(workers):
+                    if worker.exitcode is not None and not stop.is_set():
+                        raise RuntimeError("actor-process %d (%s) died with exit code %d"
+                                           % (index, worker.name, worker.exitcode))
+
+                # the transitions of all actor-processes are moved into the replay buffer
+                tick = time.perf_counter()
+                transitions = sum(ring.drain(self.replay_buffer) for ring in rings)
+                if transitions:
+                    self.telemetry.record("buffer_add", time.perf_counter() - tick)
+                    self.telemetry.count(transitions=transitions)
+
+                # the summaries of the finished episodes (the learner waits only while the buffer is too small)
+                block = len(self.replay_buffer) < batch_size
+                while episode < max_episodes:
+                    try:
+                        worker, game_reward, step, noise, duration, completed, timings = episodes.get(
+                            block=block, timeout=0.1)
+                    except queue.Empty:
+                        break
+                    block = False
+                    episode += 1
+                    self.episode_done(episode, game_reward, step, noise, duration, completed, worker)
+                    # the actor-processes measure their phases, here the mean of one step is recorded
+                    for phase, seconds in zip(("simulate", "encode", "infer"), timings):
+                        self.telemetry.record(phase, seconds / max(step, 1))
+                    self.telemetry.count(episodes=1)
+
+                # Here is the learning process
+                if len(self.replay_buffer) >= batch_size:
+                    tick = time.perf_counter()
+                    self.Policy.update(self.replay_buffer, self.updates_per_round, *self.update_parameters)
+                    self.telemetry.record("update", time.perf_counter() - tick)
+                    self.telemetry.count(updates=self.updates_per_round)
+                    self.updates += self.updates_per_round
+
+                if self.updates - last_broadcast >= self.broadcast_interval:
+                    self.broadcast()
+                    last_broadcast = self.updates
+        finally:
+            stop.set()
+            # the queue is emptied, otherwise the actor-processes can not finish
+            while any(worker.is_alive() for worker in workers):
+                try:
+                    episodes.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            for worker in workers:
+                worker.join()
+            for ring in rings:
+                ring.close()
+
+        self.episode = episode
+        return self.store
+
+    def episode_done(self, episode, game_reward, step, exploration_noise_max, duration, completed, worker):
+        # same bookkeeping as the training loop in Trainer.py
+        self.store.append(game_reward)
+
+        if self.episode_log is not None:
+            self.episode_log.write(episode, game_reward, step, duration, exploration_noise_max, completed)
+
+        if episode % 200 == 0:
+            self.replay_buffer.flush()
+            if self.episode_log is not None:
+                self.episode_log.flush()
+            if self.checkpoint is None:
+                self.Policy.save("./inTraining", "TD3")
+            else:
+                self.checkpoint.save(self.Policy, self.replay_buffer, episode,
+                                     exploration_noise_max=exploration_noise_max)
+
+        logger.info("Episode: %d\tAverage Reward: %s\t Explore: %s\t Time: %s\t Actor: %d\t Updates: %d",
+                    episode, game_reward, exploration_noise_max, duration, worker, self.updates)
@@ -26,7 +26,12 @@ SOFTWARE.
 ATTENTION !!!
 All credit for Agent.py and Buffer.py files goes to the original creator! (Nikhil Barhate)
 """
+# Changes to the original for the production flow-control: both critics fused into one module ("TwinCritic"),
+# staging tensors and fused polyak updates in "update()", batched action selection, prioritized replay and the
+# state of the agent for checkpoints.
 
+import os
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -70,6 +75,51 @@ class Critic(nn.Module):
         q = self.l4(q)
         return q
     
+class TwinCritic(nn.Module):
+    # Both critics of TD3 in one module: the weights of the two "Critic" networks are stacked,
+    # so both Q-values are calculated by one sequence of batched matmuls and trained with one optimizer.
+    def __init__(self, state_dim, action_dim):
+        super(TwinCritic, self).__init__()
+        
+        # two ordinary critics are created for the initialization of the weights
+        critics = [Critic(state_dim, action_dim), Critic(state_dim, action_dim)]
+        self.layers = ('l1', 'l2', 'l3', 'l4')
+        # weight: (2, in, out), bias: (2, 1, out)
+        self.weight = nn.ParameterList([nn.Parameter(torch.stack([getattr(c, l).weight.detach().t() for c in critics])) for l in self.layers])
+        self.bias = nn.ParameterList([nn.Parameter(torch.stack([getattr(c, l).bias.detach().unsqueeze(0) for c in critics])) for l in self.layers])
+        
+    def forward(self, state, action):
+        # returns the Q-values of both critics, shape (2, batch, 1)
+        q = torch.cat([state, action], 1).expand(2, -1, -1)
+        for i, (w, b) in enumerate(zip(self.weight, self.bias)):
+            q = torch.baddbmm(b, q, w)
+            if i < len(self.layers) - 1:
+                q = F.relu(q)
+        return q
+    
+    def Q1(self, state, action):
+        # Q-value of the first critic only (for the actor loss)
+        q = torch.cat([state, action], 1)
+        for i, (w, b) in enumerate(zip(self.weight, self.bias)):
+            q = torch.addmm(b[0], q, w[0])
+            if i < len(self.layers) - 1:
+                q = F.relu(q)
+        return q
+    
+    def critic_state_dict(self, k):
+        # state_dict of critic k (0 or 1) in the format of "Critic", to keep the saved files compatible
+        state_dict = {}
+        for l, w, b in zip(self.layers, self.weight, self.bias):
+            state_dict[l + '.weight'] = w[k].detach().t().clone()
+            state_dict[l + '.bias'] = b[k, 0].detach().clone()
+        return state_dict
+    
+    def load_critic_state_dict(self, k, state_dict):
+        with torch.no_grad():
+            for l, w, b in zip(self.layers, self.weight, self.bias):
+                w[k].copy_(state_dict[l + '.weight'].t())
+                b[k, 0].copy_(state_dict[l + '.bias'])
+    
 class TD3:
     def __init__(self, lr, state_dim, action_dim, max_action):
         
@@ -78,101 +128,174 @@ class TD3:
         self.actor_target.load_state_dict(self.actor.state_dict())
         self.actor_optimizer = optim.Adam(self.actor.parameters(), lr=lr)
         
-        self.critic_1 = Critic(state_dim, action_dim).to(device)
-        self.critic_1_target = Critic(state_dim, action_dim).to(device)
-        self.critic_1_target.load_state_dict(self.critic_1.state_dict())
-        self.critic_1_optimizer = optim.Adam(self.critic_1.parameters(), lr=lr)
-        
-        self.critic_2 = Critic(state_dim, action_dim).to(device)
-        self.critic_2_target = Critic(state_dim, action_dim).to(device)
-        self.critic_2_target.load_state_dict(self.critic_2.state_dict())
-        self.critic_2_optimizer = optim.Adam(self.critic_2.parameters(), lr=lr)
+        # critic 1 and critic 2 are fused into one module, see "TwinCritic"
+        self.critic = TwinCritic(state_dim, action_dim).to(device)
+        self.critic_target = TwinCritic(state_dim, action_dim).to(device)
+        self.critic_target.load_state_dict(self.critic.state_dict())
+        self.critic_optimizer = optim.Adam(self.critic.parameters(), lr=lr)
         
         self.max_action = max_action
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        
+        # parameters of all networks and their targets, in matching order for the polyak update
+        self.online_params = list(self.actor.parameters()) + list(self.critic.parameters())
+        self.target_params = list(self.actor_target.parameters()) + list(self.critic_target.parameters())
+        
+        # staging tensors for "update", see "staging()"
+        self.batch = None
+        # input tensor for "select_actions()"
+        self.inference_input = None
     
     def select_action(self, state):
-        state = torch.FloatTensor(state.reshape(1, -1)).to(device)
-        return self.actor(state).cpu().data.numpy().flatten()
+        return self.select_actions(state.reshape(1, -1)).flatten()
+    
+    def select_actions(self, states):
+        # actions for many factories at once: states (num_envs, state_dim) --> actions (num_envs, action_dim)
+        # the input tensor is allocated once (for the largest batch so far) and refilled in place
+        n = states.shape[0]
+        if self.inference_input is None or self.inference_input.shape[0] < n:
+            self.inference_input = torch.empty((n, self.state_dim), device=device)
+        state = self.inference_input[:n]
+        state.copy_(torch.from_numpy(np.asarray(states, dtype=np.float32)))
+        
+        with torch.inference_mode():
+            return self.actor(state).cpu().numpy()
+    
+    def staging(self, batch_size):
+        # Tensors for one batch are allocated once and refilled in place every iteration.
+        # On a GPU the host tensors are pinned so the copy to the device can run asynchronously.
+        if self.batch is not None and self.batch['state'].shape[0] == batch_size:
+            return self.batch
+        
+        pin = device.type == 'cuda'
+        shapes = {'state': (batch_size, self.state_dim), 'action': (batch_size, self.action_dim),
+                  'reward': (batch_size, 1), 'next_state': (batch_size, self.state_dim),
+                  'done': (batch_size, 1), 'weights': (batch_size, 1)}
+        self.batch = {}
+        self.host = {}
+        for name, shape in shapes.items():
+            self.host[name] = torch.empty(shape, pin_memory=pin)
+            self.batch[name] = self.host[name] if not pin else torch.empty(shape, device=device)
+        self.batch['noise'] = torch.empty((batch_size, self.action_dim), device=device)
+        return self.batch
+    
+    def polyak_update(self, polyak):
+        # target = polyak * target + (1-polyak) * param, as fused multi-tensor operation
+        with torch.no_grad():
+            if hasattr(torch, '_foreach_lerp_'):
+                torch._foreach_lerp_(self.target_params, self.online_params, 1 - polyak)
+            else:
+                for target_param, param in zip(self.target_params, self.online_params):
+                    target_param.lerp_(param, 1 - polyak)
     
     def update(self, replay_buffer, n_iter, batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay):
         
+        # a PrioritizedReplayBuffer gets the TD-errors back as priorities
+        prioritized = hasattr(replay_buffer, 'update_priorities')
+        
+        batch = self.staging(batch_size)
+        state, action, reward, next_state, done = (batch[name] for name in ('state', 'action', 'reward', 'next_state', 'done'))
+        weights, noise = batch['weights'], batch['noise']
+        
         for i in range(n_iter):
-            # Sample a batch of transitions from replay buffer:
-            state, action_, reward, next_state, done = replay_buffer.sample(batch_size)
-            state = torch.FloatTensor(state).to(device)
-            action = torch.FloatTensor(action_).to(device)
-            reward = torch.FloatTensor(reward).reshape((batch_size,1)).to(device)
-            next_state = torch.FloatTensor(next_state).to(device)
-            done = torch.FloatTensor(done).reshape((batch_size,1)).to(device)
+            # Sample a batch of transitions from replay buffer and copy it into the staging tensors:
+            sample = replay_buffer.sample(batch_size)
+            for name, array in zip(('state', 'action', 'reward', 'next_state', 'done'), sample):
+                self.host[name].copy_(torch.from_numpy(array).view(self.host[name].shape))
+            if prioritized:
+                # indexes and importance-sampling weights of this sample, passed on explicitly
+                indexes, sample_weights = sample[5:]
+                self.host['weights'].copy_(torch.from_numpy(sample_weights).view(batch_size, 1))
+            if device.type == 'cuda':
+                for name in self.host:
+                    batch[name].copy_(self.host[name], non_blocking=True)
             
-            # Select next action according to target policy:
-            noise = torch.FloatTensor(action_).data.normal_(0, policy_noise).to(device)
-            noise = noise.clamp(-noise_clip, noise_clip)
-            next_action = (self.actor_target(next_state) + noise)
-            next_action = next_action.clamp(-self.max_action, self.max_action)
-            
-            # Compute target Q-value:
-            target_Q1 = self.critic_1_target(next_state, next_action)
-            target_Q2 = self.critic_2_target(next_state, next_action)
-            target_Q = torch.min(target_Q1, target_Q2)
-            target_Q = reward + ((1-done) * gamma * target_Q).detach() # detatch == no further tracking
-            
-            # Optimize Critic 1:
-            current_Q1 = self.critic_1(state, action)
-            loss_Q1 = F.mse_loss(current_Q1, target_Q)
-            self.critic_1_optimizer.zero_grad()
-            loss_Q1.backward()
-            self.critic_1_optimizer.step()
+            with torch.no_grad():
+                # Select next action according to target policy:
+                noise.normal_(0, policy_noise).clamp_(-noise_clip, noise_clip)
+                next_action = (self.actor_target(next_state) + noise).clamp_(-self.max_action, self.max_action)
+                
+                # Compute target Q-value (both target critics in one pass):
+                target_Q1, target_Q2 = self.critic_target(next_state, next_action)
+                target_Q = torch.min(target_Q1, target_Q2)
+                target_Q = reward + ((1-done) * gamma * target_Q)
             
-            # Optimize Critic 2:
-            current_Q2 = self.critic_2(state, action)
-            loss_Q2 = F.mse_loss(current_Q2, target_Q)
-            self.critic_2_optimizer.zero_grad()
-            loss_Q2.backward()
-            self.critic_2_optimizer.step()
+            # Optimize Critic 1 and Critic 2 (both in one pass, the loss is the sum of both losses):
+            current_Q = self.critic(state, action)
+            if prioritized:
+                # TD-errors are the new priorities, the loss is weighted with the importance-sampling weights.
+                # The larger TD-error of both critics counts: a transition that one of them still gets wrong
+                # is sampled again.
+                td_error = (current_Q - target_Q).detach().abs().amax(dim=0)
+                replay_buffer.update_priorities(indexes, td_error.cpu().numpy().flatten())
+                loss_Q = (weights * (current_Q - target_Q) ** 2).mean(dim=(1, 2)).sum()
+            else:
+                loss_Q = ((current_Q - target_Q) ** 2).mean(dim=(1, 2)).sum()
+            self.critic_optimizer.zero_grad(set_to_none=True)
+            loss_Q.backward()
+            self.critic_optimizer.step()
             
             # Delayed policy updates:
             if i % policy_delay == 0:
                 # Compute actor loss:
-                actor_loss = -self.critic_1(state, self.actor(state)).mean()
+                actor_loss = -self.critic.Q1(state, self.actor(state)).mean()
                 
                 # Optimize the actor
-                self.actor_optimizer.zero_grad()
+                self.actor_optimizer.zero_grad(set_to_none=True)
                 actor_loss.backward()
                 self.actor_optimizer.step()
                 
                 # Polyak averaging update:
-                for param, target_param in zip(self.actor.parameters(), self.actor_target.parameters()):
-                    target_param.data.copy_( (polyak * target_param.data) + ((1-polyak) * param.data))
-                
-                for param, target_param in zip(self.critic_1.parameters(), self.critic_1_target.parameters()):
-                    target_param.data.copy_( (polyak * target_param.data) + ((1-polyak) * param.data))
-                
-                for param, target_param in zip(self.critic_2.parameters(), self.critic_2_target.parameters()):
-                    target_param.data.copy_( (polyak * target_param.data) + ((1-polyak) * param.data))
-                    
+                self.polyak_update(polyak)
                 
     def save(self, directory, name):
         torch.save(self.actor.state_dict(), '%s/%s_actor.pth' % (directory, name))
         torch.save(self.actor_target.state_dict(), '%s/%s_actor_target.pth' % (directory, name))
         
-        torch.save(self.critic_1.state_dict(), '%s/%s_crtic_1.pth' % (directory, name))
-        torch.save(self.critic_1_target.state_dict(), '%s/%s_critic_1_target.pth' % (directory, name))
+        torch.save(self.critic.critic_state_dict(0), '%s/%s_crtic_1.pth' % (directory, name))
+        torch.save(self.critic_target.critic_state_dict(0), '%s/%s_critic_1_target.pth' % (directory, name))
         
-        torch.save(self.critic_2.state_dict(), '%s/%s_crtic_2.pth' % (directory, name))
-        torch.save(self.critic_2_target.state_dict(), '%s/%s_critic_2_target.pth' % (directory, name))
+        torch.save(self.critic.critic_state_dict(1), '%s/%s_crtic_2.pth' % (directory, name))
+        torch.save(self.critic_target.critic_state_dict(1), '%s/%s_critic_2_target.pth' % (directory, name))
         
     def load(self, directory, name):
         self.actor.load_state_dict(torch.load('%s/%s_actor.pth' % (directory, name), map_location=lambda storage, loc: storage))
         self.actor_target.load_state_dict(torch.load('%s/%s_actor_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
         
-        self.critic_1.load_state_dict(torch.load('%s/%s_crtic_1.pth' % (directory, name), map_location=lambda storage, loc: storage))
-        self.critic_1_target.load_state_dict(torch.load('%s/%s_critic_1_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
+        self.critic.load_critic_state_dict(0, torch.load('%s/%s_crtic_1.pth' % (directory, name), map_location=lambda storage, loc: storage))
+        self.critic_target.load_critic_state_dict(0, torch.load('%s/%s_critic_1_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
         
-        self.critic_2.load_state_dict(torch.load('%s/%s_crtic_2.pth' % (directory, name), map_location=lambda storage, loc: storage))
-        self.critic_2_target.load_state_dict(torch.load('%s/%s_critic_2_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
+        self.critic.load_critic_state_dict(1, torch.load('%s/%s_crtic_2.pth' % (directory, name), map_location=lambda storage, loc: storage))
+        self.critic_target.load_critic_state_dict(1, torch.load('%s/%s_critic_2_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
         
         
     def load_actor(self, directory, name):
-        self.actor.load_state_dict(torch.load('%s/%s_actor.pth' % (directory, name), map_location=lambda storage, loc: storage))
-        self.actor_target.load_state_dict(torch.load('%s/%s_actor_target.pth' % (directory, name), map_location=lambda storage, loc: storage))
+        actor = load_actor_state_dict(directory, name)
+        self.actor.load_state_dict(actor)
+        self.actor_target.load_state_dict(actor)
+    
+    def state_dict(self):
+        # all networks and the states of both optimizers (see Checkpoint.py)
+        return {'actor': self.actor.state_dict(),
+                'actor_target': self.actor_target.state_dict(),
+                'critic': self.critic.state_dict(),
+                'critic_target': self.critic_target.state_dict(),
+                'actor_optimizer': self.actor_optimizer.state_dict(),
+                'critic_optimizer': self.critic_optimizer.state_dict()}
+    
+    def load_state_dict(self, state_dict):
+        self.actor.load_state_dict(state_dict['actor'])
+        self.actor_target.load_state_dict(state_dict['actor_target'])
+        self.critic.load_state_dict(state_dict['critic'])
+        self.critic_target.load_state_dict(state_dict['critic_target'])
+        self.actor_optimizer.load_state_dict(state_dict['actor_optimizer'])
+        self.critic_optimizer.load_state_dict(state_dict['critic_optimizer'])
+
+
+def load_actor_state_dict(directory, name):
+    # the actor of a checkpoint of the training (see Checkpoint.py) or else of the separate file of "TD3.save"
+    checkpoint = '%s/%s_checkpoint.pt' % (directory, name)
+    if os.path.exists(checkpoint):
+        return torch.load(checkpoint, map_location=lambda storage, loc: storage, weights_only=False)['agent']['actor']
+    return torch.load('%s/%s_actor.pth' % (directory, name), map_location=lambda storage, loc: storage)
@@ -0,0 +1,53 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Cache of the evaluated heuristics
+#
+# The results of the heuristics only depend on the seed and the factory, "compare_policies()" in Evaluation.py keeps
+# them per seed in one file per heuristic and factory. Reading the cache needs neither torch nor the simulator,
+# so the training curve (Display.py) can draw the heuristics as reference lines with numpy alone.
+
+########################################################################################################################
+# Importing libraries
+import os  # files of the cache
+import numpy as np  # For mathematical operations
+
+HEURISTICS = ("linearFIFO", "betterFIFO", "random")  # same seed == same result, these are cached
+CACHE_VERSION = 4  # has to be increased when a change of the simulator or the heuristics changes the results
+
+# one record per episode
+RESULT = np.dtype([('seed', '<i8'),  # seed of the factory
+                   ('reward', '<f8'),  # game reward
+                   ('steps', '<i4'),  # time-steps of the agent, == makespan if the episode is done
+                   ('done', '?'),  # all products are completed
+                   ('completed', '<f4')])  # completed share of all working-steps at the end of the episode
+
+
+def cache_file(cache, policy, configuration, max_timesteps):
+    amount_of_products, amount_of_machines, instance_seed = configuration
+    size = "%dx%s" % (amount_of_products, "manual" if amount_of_machines is None else amount_of_machines)
+    return os.path.join(cache, "%s_%s_instance%d_t%d_v%d.npy" % (policy, size, instance_seed, max_timesteps,
+                                                                 CACHE_VERSION))
+
+
+def load_cache(path):
+    return np.load(path) if os.path.exists(path) else np.zeros(0, dtype=RESULT)
+
+
+def save_cache(path, records):
+    # written into a temporary file and renamed, a cache file is always complete
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = path + ".tmp.npy"
+    np.save(temporary, records)
+    os.replace(temporary, path)
+
+
+def cached_baselines(cache="./evaluationCache", amount_of_products=5, amount_of_machines=None, instance_seed=0,
+                     max_timesteps=70):
+    # mean reward of every heuristic in the cache, e.g. for the reference lines of the training curve
+    configuration = (amount_of_products, amount_of_machines, instance_seed)
+    baselines = {}
+    for policy in HEURISTICS:
+        records = load_cache(cache_file(cache, policy, configuration, max_timesteps))
+        if len(records):
+            baselines[policy] = float(records['reward'].mean())
+    return baselines
@@ -0,0 +1,292 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Throughput of the simulators and the agent
+#
+# The same random actions are executed by the reference implementation ("factory_step()" in Environment.py),
+# by a single "Factory" and by a "VecFactory" with many environments. The result is in steps per second
+# (one step == one time step of one factory, including the state-vector).
+#
+# "run_suite()" measures every part of the training on its own, with fixed seeds and fixed factories:
+# factory_step, GenerateState, ReplayBuffer.add / sample, TD3.select_action and TD3.update, for several sizes of the
+# factory and of the batch. The results are saved as JSON and compared with a stored baseline ("compare()"),
+# a metric that got worse by more than the tolerance is a regression.
+#
+# python MAIN.py benchmark --suite [--quick] [--output results.json] [--baseline baseline.json] [--update-baseline]
+
+########################################################################################################################
+# Importing libraries
+import os  # the baseline is optional
+import sys  # versions of the environment
+import copy  # the lists of the reference implementation are changed in place
+import json  # results and baseline
+import random  # seed of "create_factory()"
+import platform  # machine of the results
+import time  # time library to get time for benchmarking
+import numpy as np  # For mathematical operations
+import torch  # seed and threads of the agent
+from Environment import create_factory, factory_step, GenerateState  # reference implementation of the factory
+from Heuristics import GenerateRandomAction  # random actions
+from Factory import Factory  # importing Factory-Class from other file
+from EventFactory import EventFactory  # importing event-driven Factory-Class from other file
+from Simulator import VecFactory  # importing batched simulator from other file
+from Instance import configure_factory  # manually defined or generated factory
+from Buffer import ReplayBuffer  # importing Buffer-Class from other file
+from Agent import TD3  # importing Agent-Class from other file
+from Trainer import Create_Update_Parameters  # parameters of the update
+
+# sizes of the factory: name --> (amount_of_products, amount_of_machines), None == the manually defined factory
+SIZES = {"5x5": (5, None), "20x40": (20, 40), "50x200": (50, 200)}
+BATCH_SIZES = (100, 256, 1024)
+
+
+def benchmark_reference(factory, steps, max_timesteps=70):
+    ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done, score, Machine_Failure_Counter, Machine_Failure_Info = copy.deepcopy(factory)
+    start = time.perf_counter()
+    for step in range(steps):
+        Action = GenerateRandomAction(WorkingTime, ProductDesign)
+        ProductDesign, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, reward, done = factory_step(
+            ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done,
+            Machine_Failure_Counter, Machine_Failure_Info, Action, step % max_timesteps, max_timesteps, 0)
+        GenerateState(ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival,
+                      ProductBucket, done, Machine_Failure_Counter, Machine_Failure_Info)
+        if done or step % max_timesteps == max_timesteps - 1:
+            ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done, score, Machine_Failure_Counter, Machine_Failure_Info = copy.deepcopy(factory)
+    return steps / (time.perf_counter() - start)
+
+
+def benchmark_vectorized(factory, steps, num_envs=None, max_timesteps=70, seed=None):
+    # num_envs == None: a single "Factory"
+    WorkingTime, TravelTime, amount_of_products = factory[1], factory[2], len(factory[5])
+    if num_envs is None:
+        env = Factory(WorkingTime, TravelTime, amount_of_products, max_timesteps, seed=seed)
+        rounds, num_envs = steps, 1
+    else:
+        env = VecFactory(WorkingTime, TravelTime, amount_of_products, num_envs, max_timesteps, seed=seed)
+        rounds = max(steps // num_envs, 1)
+    env.reset()
+    start = time.perf_counter()
+    for step in range(rounds):
+        env.step(env.GenerateRandomAction())
+        env.GenerateState()
+        if num_envs == 1:
+            if env.done[0] or env.step_count[0] >= max_timesteps:
+                env.reset()
+        else:
+            finished = env.done | (env.step_count >= max_timesteps)
+            if finished.any():
+                env.reset(finished)
+    return rounds * num_envs / (time.perf_counter() - start)
+
+
+def benchmark(steps=20000, num_envs=256, seed=0):
+    # Returns the steps per second of all simulators
+    random.seed(seed)
+    np.random.seed(seed)
+    factory = create_factory()
+    return {"reference": benchmark_reference(factory, steps),
+            "Factory": benchmark_vectorized(factory, steps, seed=seed),
+            "VecFactory(%d)" % num_envs: benchmark_vectorized(factory, steps, num_envs, seed=seed)}
+
+
+########################################################################################################################
+# Suite
+
+
+def seed_all(seed):
+    # every measurement starts from the same random numbers
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def best_rate(function, count, repeats=3):
+    # "count" operations per call of "function", the fastest of "repeats" calls (the least disturbed one)
+    return max(count / timed(function) for x in range(repeats))
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def latencies(function, count, batch=1):
+    # duration of every single call, or the mean duration of "batch" calls in a row for calls that are too short
+    # to be timed one by one (a call of ~1 us is of the order of the overhead and resolution of the timer)
+    samples = np.empty(count)
+    calls = range(batch)
+    for x in range(count):
+        start = time.perf_counter()
+        for call in calls:
+            function()
+        samples[x] = (time.perf_counter() - start) / batch
+    return samples
+
+
+def percentiles(name, samples, results):
+    for percentile in (50, 90, 99):
+        results["%s/p%d" % (name, percentile)] = {"value": float(np.percentile(samples, percentile)), "unit": "s"}
+
+
+def suite_factory(name, amount_of_products, amount_of_machines, steps, seed, results, max_timesteps=70):
+    # factory_step and GenerateState of the reference implementation and of the simulators, separately
+    seed_all(seed)
+    factory = list(create_factory(amount_of_products, amount_of_machines))
+    WorkingTime, TravelTime, amount_of_products = configure_factory(amount_of_products, amount_of_machines, seed)
+    if amount_of_machines is not None:
+        # the reference runs on the same generated factory as the simulators, as lists with "None"
+        factory[1] = [[None if t < 0 else t for t in row] for row in WorkingTime.dense().tolist()]
+        factory[2] = [[None if t < 0 else t for t in row] for row in TravelTime.tolist()]
+
+    def reference_steps():
+        ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done, score, Machine_Failure_Counter, Machine_Failure_Info = copy.deepcopy(factory)
+        for step in range(steps):
+            Action = GenerateRandomAction(WorkingTime, ProductDesign)
+            ProductDesign, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, reward, done = factory_step(
+                ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket,
+                done, Machine_Failure_Counter, Machine_Failure_Info, Action, step % max_timesteps, max_timesteps, 0)
+            if done or step % max_timesteps == max_timesteps - 1:
+                ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done, score, Machine_Failure_Counter, Machine_Failure_Info = copy.deepcopy(factory)
+
+    seed_all(seed)
+    results["factory_step/reference/%s" % name] = {"value": best_rate(reference_steps, steps), "unit": "steps/s"}
+    results["GenerateState/reference/%s" % name] = {
+        "value": best_rate(lambda: [GenerateState(*factory[:7], *factory[8:]) for x in range(steps)], steps),
+        "unit": "states/s"}
+
+    for simulator, num_envs in (("Factory", 1), ("EventFactory", 1), ("VecFactory(64)", 64)):
+        seed_all(seed)
+        if simulator == "VecFactory(64)":
+            env = VecFactory(WorkingTime, TravelTime, amount_of_products, num_envs, max_timesteps, seed=seed)
+        else:
+            env = (EventFactory if simulator == "EventFactory" else Factory)(WorkingTime, TravelTime,
+                                                                              amount_of_products, max_timesteps,
+                                                                              seed=seed)
+        rounds = max(steps // num_envs, 1)
+        # the random actions are drawn before, only the simulator is measured
+        actions = np.random.randint(-1, env.amount_of_machines, (rounds, num_envs, amount_of_products))
+        if num_envs == 1:
+            actions = actions[:, 0]
+
+        def simulator_steps():
+            env.reset()
+            for Action in actions:
+                env.step(Action)
+                finished = env.done | (env.step_count >= max_timesteps)
+                if finished.any():
+                    env.reset() if num_envs == 1 else env.reset(finished)
+
+        # a step of the "EventFactory" is one decision, it can skip several time steps
+        unit = "decisions/s" if simulator == "EventFactory" else "steps/s"
+        results["factory_step/%s/%s" % (simulator, name)] = {"value": best_rate(simulator_steps, rounds * num_envs),
+                                                              "unit": unit}
+        if num_envs == 1 and simulator == "Factory":
+            results["GenerateState/StateEncoder/%s" % name] = {
+                "value": best_rate(lambda: [env.GenerateState() for x in range(steps)], steps), "unit": "states/s"}
+
+    return env.encoder.state_dim, amount_of_products * (env.amount_of_machines + 1)
+
+
+def suite_buffer(name, state_dim, action_dim, batch_sizes, count, seed, results):
+    # latency of one "add" (one transition, timed in batches of 100) and of one "sample" (one batch);
+    # at most ~256 MB of transitions
+    seed_all(seed)
+    capacity = int(min(100000, 2 ** 28 // (4 * (2 * state_dim + action_dim + 2))))
+    replay_buffer = ReplayBuffer(max_size=capacity)
+    transition = (np.random.uniform(-1, 1, state_dim).astype(np.float32),
+                  np.random.uniform(-1, 1, action_dim).astype(np.float32), 1.0,
+                  np.random.uniform(-1, 1, state_dim).astype(np.float32), 0.0)
+    # the buffer is filled first, so "add" writes into memory that is already mapped
+    for x in range(capacity):
+        replay_buffer.add(transition)
+
+    percentiles("ReplayBuffer.add/%s" % name, latencies(lambda: replay_buffer.add(transition), count, 100), results)
+    for batch_size in batch_sizes:
+        percentiles("ReplayBuffer.sample/%s/batch%d" % (name, batch_size),
+                    latencies(lambda: replay_buffer.sample(batch_size), count), results)
+    return replay_buffer
+
+
+def suite_agent(name, state_dim, action_dim, replay_buffer, batch_sizes, count, iterations, seed, results):
+    seed_all(seed)
+    Policy = TD3(0.00025, state_dim, action_dim, 1)
+    state = np.random.uniform(-1, 1, state_dim).astype(np.float32)
+    Policy.select_action(state)  # warm-up: allocation of the input tensor
+    percentiles("TD3.select_action/%s" % name, latencies(lambda: Policy.select_action(state), count), results)
+
+    batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay = Create_Update_Parameters()
+    for batch_size in batch_sizes:
+        seed_all(seed)
+        Policy.update(replay_buffer, 1, batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay)
+        results["TD3.update/%s/batch%d" % (name, batch_size)] = {
+            "value": best_rate(lambda: Policy.update(replay_buffer, iterations, batch_size, gamma, polyak,
+                                                     policy_noise, noise_clip, policy_delay), iterations),
+            "unit": "iterations/s"}
+
+
+def run_suite(quick=False, seed=0, sizes=None, batch_sizes=BATCH_SIZES):
+    """
+    # ##################################################################################################################
+    # quick         fewer repetitions and only the two smallest factories (for a fast check, not for a baseline)
+    # sizes         names of SIZES, None == all
+    #
+    # Returns {"metadata": {...}, "results": {metric: {"value": ..., "unit": ...}}}
+    # unit "s" == latency (lower is better), "x/s" == throughput (higher is better)
+    # ##################################################################################################################
+    """
+    if sizes is None:
+        sizes = list(SIZES)[:2] if quick else list(SIZES)
+    steps, count, iterations = (500, 200, 5) if quick else (5000, 2000, 50)
+
+    results = {}
+    for name in sizes:
+        amount_of_products, amount_of_machines = SIZES[name]
+        # large factories get fewer repetitions (the same for every run, so the results stay comparable)
+        scale = max(1, (amount_of_machines or 5) // 10)
+        state_dim, action_dim = suite_factory(name, amount_of_products, amount_of_machines, max(steps // scale, 70),
+                                              seed, results)
+        replay_buffer = suite_buffer(name, state_dim, action_dim, batch_sizes, max(count // scale, 50), seed, results)
+        suite_agent(name, state_dim, action_dim, replay_buffer, batch_sizes, max(count // scale, 50),
+                    max(iterations // scale, 2), seed, results)
+        del replay_buffer
+
+    metadata = {"seed": seed, "quick": quick, "sizes": {name: SIZES[name] for name in sizes},
+                "batch_sizes": list(batch_sizes), "python": sys.version.split()[0], "numpy": np.__version__,
+                "torch": torch.__version__, "torch_threads": torch.get_num_threads(),
+                "device": "cuda" if torch.cuda.is_available() else "cpu", "platform": platform.platform(),
+                "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count(),
+                "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    return {"metadata": metadata, "results": results}
+
+
+def save_results(suite, path):
+    with open(path, "w") as file:
+        json.dump(suite, file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(suite, baseline, tolerance=0.25, tail_tolerance=0.5):
+    """
+    # Returns the regressions: every metric that is more than "tolerance" (0.25 == 25 %) slower than in the baseline,
+    # as (metric, baseline value, new value, change) with the change in percent (negative == slower)
+    # Metrics that are only in one of both are skipped.
+    # The tail latencies (p90, p99) depend more on the load of the machine, they get the larger "tail_tolerance"
+    # (0.5 == a decision takes twice as long), so only a real regression of the tail fails a run.
+    """
+    regressions = []
+    for metric, result in sorted(suite["results"].items()):
+        if metric not in baseline["results"]:
+            continue
+        allowed = tail_tolerance if metric.endswith(("/p90", "/p99")) else tolerance
+        old, new = baseline["results"][metric]["value"], result["value"]
+        if result["unit"] == "s":
+            change = old / new - 1 if new > 0 else 0.0  # latency: larger is slower
+        else:
+            change = new / old - 1 if old > 0 else 0.0
+        if change < -allowed:
+            regressions.append((metric, old, new, 100 * change))
+    return regressions
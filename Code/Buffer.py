@@ -27,38 +27,247 @@ ATTENTION !!!
 All credit for Agent.py and Buffer.py files goes to the original creator! (Nikhil Barhate)
 """
 
+import os
+import logging
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class ReplayBuffer:
-    def __init__(self, max_size = 3000000):
-        self.buffer = []
+    def __init__(self, max_size = 3000000, directory = None, resume = False, state_dim = None, action_dim = None):
+        # transitions are stored in contiguous float32 arrays, used as a ring:
+        # when full, the oldest transition is overwritten
+        #
+        # if a directory is given, the arrays are memory-mapped files in this directory (capacity can exceed RAM)
+        # and a small header keeps the write cursor, so a resumed run can reopen the buffer
+        # resume: the files of an earlier run are reopened (and checked against state_dim, action_dim),
+        # otherwise the buffer starts empty and the files are overwritten
         self.max_size = int(max_size)
+        self.directory = directory
         self.size = 0
+        self.ptr = 0
+        self.state = None
+        self.header = None
+        
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            header = os.path.join(directory, 'header.npy')
+            if resume and os.path.exists(header):
+                self.reopen(state_dim, action_dim)
+            elif os.path.exists(header):
+                # a later resume must not reopen the transitions of an older run
+                os.remove(header)
+    
+    def array(self, name, shape):
+        if self.directory is None:
+            return np.empty(shape, dtype=np.float32)
+        return np.lib.format.open_memmap(os.path.join(self.directory, '%s.npy' % name), mode='w+',
+                                         dtype=np.float32, shape=shape)
+    
+    def allocate(self, state_dim, action_dim):
+        # arrays are allocated with the first transition, when the dimensions are known
+        self.state = self.array('state', (self.max_size, state_dim))
+        self.action = self.array('action', (self.max_size, action_dim))
+        self.reward = self.array('reward', (self.max_size,))
+        self.next_state = self.array('next_state', (self.max_size, state_dim))
+        self.done = self.array('done', (self.max_size,))
+        
+        if self.directory is not None:
+            # header: write cursor, size, max_size, state_dim, action_dim
+            self.header = np.lib.format.open_memmap(os.path.join(self.directory, 'header.npy'), mode='w+',
+                                                    dtype=np.int64, shape=(5,))
+            self.header[:] = self.ptr, self.size, self.max_size, state_dim, action_dim
+    
+    def reopen(self, state_dim = None, action_dim = None):
+        # opens the files of an earlier run without copying them into memory
+        def open_array(name):
+            return np.load(os.path.join(self.directory, '%s.npy' % name), mmap_mode='r+')
+        
+        self.header = open_array('header')
+        dims = tuple(int(x) for x in self.header[3:5])
+        if (state_dim, action_dim) != (None, None) and dims != (state_dim, action_dim):
+            raise ValueError("replay buffer in %s holds transitions with state_dim, action_dim = %s, expected %s"
+                             % (self.directory, dims, (state_dim, action_dim)))
+        self.ptr, self.size, self.max_size = (int(x) for x in self.header[:3])
+        self.state = open_array('state')
+        self.action = open_array('action')
+        self.reward = open_array('reward')
+        self.next_state = open_array('next_state')
+        self.done = open_array('done')
     
     def add(self, transition):
-        self.size += 1
-        # print(self.size)
         # transiton is tuple of (state, action, reward, next_state, done)
-        self.buffer.append(transition)
+        s, a, r, s_, d = transition
+        if self.state is None:
+            self.allocate(np.size(s), np.size(a))
+        
+        i = self.ptr
+        self.state[i] = s
+        self.action[i] = a
+        self.reward[i] = r
+        self.next_state[i] = s_
+        self.done[i] = d
+        
+        self.ptr = (self.ptr + 1) % self.max_size
+        self.size = min(self.size + 1, self.max_size)
+        if self.header is not None:
+            self.header[0] = self.ptr
+            self.header[1] = self.size
+    
+    def add_batch(self, state, action, reward, next_state, done):
+        # adds many transitions at once (e.g. a whole episode), arrays with one row per transition
+        n = len(reward)
+        if self.state is None:
+            self.allocate(np.shape(state)[1], np.shape(action)[1])
+        if n > self.max_size:
+            # only the last max_size transitions are kept: the earlier ones would be overwritten by the same call
+            # (in no defined order, and the priorities of a PrioritizedReplayBuffer would be set twice)
+            skip = n - self.max_size
+            state, action, reward, next_state, done = (np.asarray(x)[skip:] for x in (state, action, reward,
+                                                                                         next_state, done))
+            self.ptr = (self.ptr + skip) % self.max_size
+            n = self.max_size
+        
+        indexes = (self.ptr + np.arange(n)) % self.max_size
+        self.state[indexes] = state
+        self.action[indexes] = action
+        self.reward[indexes] = reward
+        self.next_state[indexes] = next_state
+        self.done[indexes] = done
+        
+        self.ptr = (self.ptr + n) % self.max_size
+        self.size = min(self.size + n, self.max_size)
+        if self.header is not None:
+            self.header[0] = self.ptr
+            self.header[1] = self.size
+        return indexes
+    
+    def sample(self, batch_size):
+        indexes = np.random.randint(0, self.size, size=batch_size)
+        
+        return self.state[indexes], self.action[indexes], self.reward[indexes], self.next_state[indexes], self.done[indexes]
+    
+    def flush(self):
+        # writes the memory-mapped arrays to disk (the OS does this by itself, but not at a known time)
+        if self.header is not None:
+            for array in (self.state, self.action, self.reward, self.next_state, self.done, self.header):
+                array.flush()
+    
+    def __len__(self):
+        return self.size
+    
+    def state_dict(self):
+        # write cursor for a checkpoint (see Checkpoint.py), the transitions themselves are not included
+        return {'ptr': self.ptr, 'size': self.size}
+    
+    def load_state_dict(self, state_dict):
+        # the cursor is only restored if the transitions were kept (buffer on disk),
+        # a buffer in memory starts empty after a restart
+        if self.state is None:
+            if state_dict['size']:
+                logger.warning("the replay buffer starts empty: the %d transitions of the checkpoint were only kept "
+                               "in memory (keep the buffer on disk to resume with them)", state_dict['size'])
+            return
+        self.ptr, self.size = state_dict['ptr'], state_dict['size']
+        if self.header is not None:
+            self.header[0] = self.ptr
+            self.header[1] = self.size
 
+class SumTree:
+    # binary tree in one array: node i has the children 2i and 2i+1, the leaves start at "leaves"
+    # every node holds the sum of its children, the root (node 1) the sum of all priorities
+    def __init__(self, capacity):
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+        self.depth = int(np.log2(self.leaves))
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+    
+    def total(self):
+        return self.tree[1]
+    
+    def update(self, indexes, priorities):
+        # O(log n): the new priorities are set and the sums are recalculated up to the root
+        nodes = np.asarray(indexes) + self.leaves
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+    
+    def find(self, values):
+        # O(log n): for every value the leaf is found where the cumulative sum of priorities passes the value
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaves
+    
+    def get(self, indexes):
+        return self.tree[np.asarray(indexes) + self.leaves]
 
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Transitions with a large TD-error are sampled more often (prioritized experience replay).
+    # alpha: how much the priorities count (0 == uniform)
+    # beta: how much the bias of the sampling is corrected by importance-sampling weights, increased up to 1
+    def __init__(self, max_size = 3000000, directory = None, resume = False, state_dim = None, action_dim = None,
+                 alpha = 0.6, beta = 0.4, beta_increment = 1e-6, epsilon = 1e-3):
+        super(PrioritizedReplayBuffer, self).__init__(max_size, directory, resume, state_dim, action_dim)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(self.max_size)
+        if self.size:
+            # priorities are not stored on disk, a reopened buffer starts uniform
+            self.tree.update(np.arange(self.size), self.max_priority)
+    
+    def add(self, transition):
+        # new transitions get the highest priority so far, to be sampled at least once
+        i = self.ptr
+        super(PrioritizedReplayBuffer, self).add(transition)
+        self.tree.update([i], self.max_priority)
+    
+    def add_batch(self, state, action, reward, next_state, done):
+        indexes = super(PrioritizedReplayBuffer, self).add_batch(state, action, reward, next_state, done)
+        self.tree.update(indexes, self.max_priority)
+        return indexes
     
     def sample(self, batch_size):
-        # delete 1/5th of the buffer when full
-        if self.size > self.max_size:
-            del self.buffer[0:int(self.size/5)]
-            self.size = len(self.buffer)
+        # the sum of priorities is divided in "batch_size" segments, one transition is drawn from each segment
+        # Returns the transitions, their indexes (for "update_priorities()") and their importance-sampling weights
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + np.random.uniform(0, 1, batch_size)) * segment
+        indexes = np.minimum(self.tree.find(values), self.size - 1)
         
-        indexes = np.random.randint(0, len(self.buffer), size=batch_size)
-        state, action, reward, next_state, done = [], [], [], [], []
+        # importance-sampling weights, normalized by the largest weight
+        probabilities = self.tree.get(indexes) / self.tree.total()
+        weights = (self.size * np.maximum(probabilities, 1e-12)) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
         
-        for i in indexes:
-            s, a, r, s_, d = self.buffer[i]
-            state.append(np.array(s, copy=False))
-            action.append(np.array(a, copy=False))
-            reward.append(np.array(r, copy=False))
-            next_state.append(np.array(s_, copy=False))
-            done.append(np.array(d, copy=False))
-        
-        return np.array(state), np.array(action), np.array(reward), np.array(next_state), np.array(done)
+        return (self.state[indexes], self.action[indexes], self.reward[indexes], self.next_state[indexes],
+                self.done[indexes], indexes, weights)
+    
+    def update_priorities(self, indexes, td_errors):
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indexes, priorities)
+    
+    def state_dict(self):
+        state_dict = super(PrioritizedReplayBuffer, self).state_dict()
+        state_dict.update(beta=self.beta, max_priority=self.max_priority,
+                          priorities=self.tree.get(np.arange(self.size)).copy())
+        return state_dict
     
+    def load_state_dict(self, state_dict):
+        super(PrioritizedReplayBuffer, self).load_state_dict(state_dict)
+        self.beta = state_dict['beta']
+        if self.state is None:
+            return
+        self.max_priority = state_dict['max_priority']
+        self.tree = SumTree(self.max_size)
+        self.tree.update(np.arange(self.size), state_dict['priorities'])
@@ -0,0 +1,114 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Checkpoints of the training
+#
+# "TD3.save()" writes six files while the training waits, a crash in between leaves files of different generations,
+# and the states of the optimizers are lost. A checkpoint is one file with everything needed to continue:
+#
+# agent           all networks and both Adam-optimizers ("TD3.state_dict()")
+# replay_buffer   write cursor (and priorities) of the buffer ("ReplayBuffer.state_dict()")
+# rng             states of the random generators (random, numpy, torch)
+# episode         number of the last finished episode
+# training        everything else of the training loop, e.g. the current exploration noise and the random streams
+#                 of the factory (see Streams.py)
+#
+# "Checkpoint.save()" only copies the state, a background thread writes it into a temporary file and renames it,
+# so the file on disk is always one complete checkpoint. "resume()" restores all of it.
+
+########################################################################################################################
+# Importing libraries
+import os  # atomic rename of the file
+import random  # state of the random generator
+import threading  # the file is written in the background
+import numpy as np  # For mathematical operations
+import torch  # for saving the networks
+
+
+def snapshot(value):
+    # copy of a (nested) state that is not changed by the continuing training
+    if isinstance(value, torch.Tensor):
+        return value.detach().to("cpu", copy=True)
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(snapshot(item) for item in value)
+    return value
+
+
+def rng_state():
+    state = {'random': random.getstate(), 'numpy': np.random.get_state(), 'torch': torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+class Checkpoint:
+    """
+    # ##################################################################################################################
+    # path   file of the checkpoint, e.g. "./inTraining/TD3_checkpoint.pt"
+    #        ("TD3.load_actor()" prefers this file to the separate files of "TD3.save()")
+    #
+    # Only one checkpoint is written at a time: "save()" waits for the previous one.
+    # An error of the background thread is raised by the next "save()" or "wait()".
+    # ##################################################################################################################
+    """
+
+    def __init__(self, path="./inTraining/TD3_checkpoint.pt"):
+        self.path = path
+        self.thread = None
+        self.error = None
+
+    def save(self, Policy, replay_buffer, episode, **training):
+        state = snapshot({'agent': Policy.state_dict(),
+                          'replay_buffer': replay_buffer.state_dict(),
+                          'rng': rng_state(),
+                          'episode': episode,
+                          'training': training})
+        self.wait()
+        self.thread = threading.Thread(target=self.write, args=(state,))
+        self.thread.start()
+
+    def write(self, state):
+        temporary = self.path + ".tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temporary, "wb") as file:
+                torch.save(state, file)
+                file.flush()
+                os.fsync(file.fileno())
+            # the old checkpoint is replaced in one step
+            os.replace(temporary, self.path)
+        except BaseException as error:
+            self.error = error
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+def resume(path, Policy, replay_buffer):
+    """
+    # Restores the agent, the cursor of the replay buffer and the random generators from the checkpoint "path".
+    # Returns the checkpoint, e.g. checkpoint['episode'] and checkpoint['training'] for the training loop.
+    """
+    checkpoint = torch.load(path, map_location=lambda storage, loc: storage, weights_only=False)
+    Policy.load_state_dict(checkpoint['agent'])
+    replay_buffer.load_state_dict(checkpoint['replay_buffer'])
+    set_rng_state(checkpoint['rng'])
+    return checkpoint
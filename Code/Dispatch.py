@@ -0,0 +1,151 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Online dispatching with the trained actor
+#
+# On the shop floor the trained actor is asked for every dispatch decision, so the time to react has to be
+# short and predictable. "Dispatcher" builds and loads only the actor-network (from the same files as
+# "TD3.load_actor()": the checkpoint, or else the file of "TD3.save()"), no critics, targets or optimizers.
+# It freezes the actor as TorchScript, runs single-threaded and returns the decoded actions ("extract_Actions()").
+# The time of the last decisions is recorded in a ring of fixed size, so a long-running dispatcher does not grow.
+#
+# Usage (latency test with random states, optionally exporting the frozen actor):
+# python Dispatch.py ./inTraining TD3 --products 5 --decisions 10000 --export actor.pt
+# Dispatching of state-vectors from stdin: python MAIN.py serve
+
+########################################################################################################################
+# Importing libraries
+import argparse  # for the command line
+import sys  # error messages and latencies of "serve()" on stderr
+import time  # time library to get time for benchmarking
+import numpy as np  # For mathematical operations
+import torch  # for the actor-network
+from Agent import Actor, load_actor_state_dict  # actor-network of the agent
+from Actions import extract_Actions  # decoding of actions
+
+
+class Dispatcher:
+    """
+    # ##################################################################################################################
+    # directory, name       files of the actor like in "TD3.load_actor()" (e.g. "./inTraining", "TD3")
+    # amount_of_products    the number of machines follows from the size of the actor
+    # history               number of the last decision times kept for "latency_percentiles()"
+    #
+    # dispatch(state)       state-vector --> Action (-1 == inject, 0..machines-1 == send to machine)
+    # ##################################################################################################################
+    """
+
+    def __init__(self, directory, name, amount_of_products, max_action=1, history=100000):
+        # one thread: no waiting for other threads, the time to react stays predictable
+        torch.set_num_threads(1)
+
+        # the dimensions are taken from the saved actor
+        state_dict = load_actor_state_dict(directory, name)
+        self.state_dim = state_dict['l1.weight'].shape[1]
+        self.action_dim = state_dict['l3.weight'].shape[0]
+        self.amount_of_products = amount_of_products
+        self.amount_of_machines = self.action_dim // amount_of_products - 1
+
+        self.actor = Actor(self.state_dim, self.action_dim, max_action)
+        self.actor.load_state_dict(state_dict)
+        self.actor.eval()
+
+        # frozen TorchScript: weights become constants, no Python in the forward pass
+        self.input = torch.zeros((1, self.state_dim))
+        with torch.no_grad():
+            self.module = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.script(self.actor)))
+
+        self.latencies = np.zeros(history)  # ring of the last decision times in seconds
+        self.decisions = 0  # number of decisions so far, position in the ring == decisions % history
+
+    def dispatch(self, state):
+        start = time.perf_counter()
+
+        self.input.copy_(torch.from_numpy(np.asarray(state, dtype=np.float32).reshape(1, -1)))
+        with torch.inference_mode():
+            Action_raw = self.module(self.input)[0].numpy()
+
+        Action = extract_Actions(Action_raw, self.amount_of_products, self.amount_of_machines)
+
+        self.latencies[self.decisions % len(self.latencies)] = time.perf_counter() - start
+        self.decisions += 1
+        return Action
+
+    def reset_latencies(self):
+        # e.g. after a warm-up
+        self.decisions = 0
+
+    def latency_percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        # percentiles of the recorded decision times in microseconds (nan without a decision)
+        latencies = self.latencies[:min(self.decisions, len(self.latencies))] * 1e6
+        if not len(latencies):
+            return {p: float("nan") for p in percentiles}
+        return {p: float(np.percentile(latencies, p)) for p in percentiles}
+
+    def report(self, file=None):
+        file = sys.stderr if file is None else file
+        file.write("{} decisions, {}\n".format(self.decisions, ", ".join(
+            "p{}: {:.1f} us".format(p, latency) for p, latency in self.latency_percentiles().items())))
+        file.flush()
+
+    def save(self, path):
+        # the frozen actor can be loaded without this code: torch.jit.load(path)
+        self.module.save(path)
+
+    def export_onnx(self, path):
+        torch.onnx.export(self.actor, self.input, path, input_names=['state'], output_names=['Action_raw'])
+
+
+def serve(dispatcher, input, output, errors=None, report_interval=10000):
+    # one state-vector per line (numbers separated by spaces or commas) --> one line with the actions
+    # An invalid line gets an error message on "errors" and no answer, the dispatching goes on.
+    # The latency percentiles are written to "errors" every "report_interval" decisions and at the end of the input.
+    errors = sys.stderr if errors is None else errors
+    for number, line in enumerate(input, 1):
+        if not line.strip():
+            continue
+        try:
+            state = np.array(line.replace(',', ' ').split(), dtype=np.float32)
+        except ValueError as error:
+            errors.write("line {}: {}\n".format(number, error))
+            errors.flush()
+            continue
+        if len(state) != dispatcher.state_dim:
+            errors.write("line {}: {} numbers, the state-vector has {}\n".format(number, len(state),
+                                                                                 dispatcher.state_dim))
+            errors.flush()
+            continue
+        Action = dispatcher.dispatch(state)
+        output.write(' '.join(str(a) for a in Action) + '\n')
+        output.flush()
+        if report_interval and dispatcher.decisions % report_interval == 0:
+            dispatcher.report(errors)
+    if not report_interval or dispatcher.decisions % report_interval:  # not reported just now
+        dispatcher.report(errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of the online dispatching with a trained actor")
+    parser.add_argument("directory", help="folder of the saved actor, e.g. ./inTraining")
+    parser.add_argument("name", help="name of the saved actor, e.g. TD3")
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--decisions", type=int, default=10000)
+    parser.add_argument("--export", help="file for the frozen TorchScript actor")
+    parser.add_argument("--onnx", help="file for the actor in ONNX format")
+    args = parser.parse_args()
+
+    dispatcher = Dispatcher(args.directory, args.name, args.products)
+
+    states = np.random.uniform(-1, 1, (args.decisions, dispatcher.state_dim)).astype(np.float32)
+    for state in states[:100]:  # warm-up
+        dispatcher.dispatch(state)
+    dispatcher.reset_latencies()
+    for state in states:
+        dispatcher.dispatch(state)
+
+    for p, latency in dispatcher.latency_percentiles().items():
+        print("p{}: {:.1f} us".format(p, latency))
+
+    if args.export:
+        dispatcher.save(args.export)
+    if args.onnx:
+        dispatcher.export_onnx(args.onnx)
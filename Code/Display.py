@@ -1,68 +1,118 @@
+import os
 import pickle
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
-import time
-
-reward = pickle.load(open("reward-storage.p", "rb"))
-avg_rew = []
-top = []
-mid = []
-tq = []
-nipe = []
-nifi = []
-nini = []
-null = []
-worst = []
-fifo =[]
-
-summe = 0
-
-smoothing = 1000
+from EpisodeLog import read_episodes
+from Baselines import cached_baselines
+
+# Training curve of a run
+#
+# Everything is computed on whole arrays: the moving average with a cumulative sum (O(n)),
+# the percentiles only at the resolution of the plot, and the raw rewards are reduced to the minimum and maximum
+# of every pixel column before plotting. The reference levels are horizontal lines.
+# The mean rewards of the heuristics are taken from the cache of the evaluation (python MAIN.py evaluate --policies
+# linearFIFO betterFIFO random), they are only drawn if they have been evaluated.
+#
+# python Display.py [--log episodes.log] [--smoothing 1000] [--pixels 2000] [--cache ./evaluationCache]
+
 p = 5  # produkte
 m = 5  # maschinen
-s = p*m # schritte
-
-for x in range(len(reward)):
-    if x < smoothing:
-        avg = sum(reward[0:(x + 1)]) / (x + 1)
-        avg_rew.append(avg)
-
-    else:
-        avg = sum(reward[x - smoothing:x]) / smoothing
-        avg_rew.append(avg)
-
-    summe += reward[x]
-
-    top.append(s ** 3)
-    mid.append((s/2) ** 3)
-    tq.append((s / 4 * 3) ** 3)
-    nipe.append((s * 0.9) ** 3)
-    nifi.append((s * 0.95) ** 3)
-    nini.append((s * 0.99) ** 3)
-    worst.append(-s/2*90)
-    null.append(0)
-    fifo.append(5200)
-
-print(summe/len(reward))
-print((summe/len(reward))**0.3333)
-
-plt.figure().set_size_inches(21, 9)
-plt.plot(reward)
-plt.plot(avg_rew, c="red", label='Average reward')
-plt.plot(top, c="green", label='100% complete')
-plt.plot(nifi, c="brown", label='95% complete')
-plt.plot(nini, c="orange", label='99% complete')
-plt.plot(nipe, c="pink", label='90% complete')
-plt.plot(tq, c="orange", label='75% complete')
-plt.plot(mid, c="yellow", label='50% complete')
-plt.plot(null, c="Black", label='0% complete')
-plt.plot(fifo, c="Black", label='FIFO')
-plt.xlabel("Episodes")
-plt.ylabel("Reward")
-plt.legend(loc='upper left', frameon=True)
-plt.savefig('update.pdf', dpi=5000, transparent=True, bbox_inches='tight')
-plt.savefig("update.jpg", dpi=150)
-plt.show()
+s = p * m  # schritte
+
+# reference levels: reward, colour, label
+references = [(s ** 3, "green", '100% complete'),
+              ((s * 0.95) ** 3, "brown", '95% complete'),
+              ((s * 0.99) ** 3, "orange", '99% complete'),
+              ((s * 0.9) ** 3, "pink", '90% complete'),
+              ((s / 4 * 3) ** 3, "orange", '75% complete'),
+              ((s / 2) ** 3, "yellow", '50% complete'),
+              (0, "Black", '0% complete')]
+
+
+def load_rewards(path="episodes.log"):
+    # the log of the training (see EpisodeLog.py), older runs only have the pickled rewards
+    if os.path.exists(path):
+        return np.asarray(read_episodes(path)["reward"], dtype=np.float64)
+    return np.asarray(pickle.load(open("reward-storage.p", "rb")), dtype=np.float64)
+
+
+def rolling_mean(reward, smoothing):
+    # mean of the last "smoothing" rewards (of all rewards so far at the beginning), O(n) with a cumulative sum
+    cumulative = np.concatenate(([0], np.cumsum(reward)))
+    x = np.arange(len(reward))
+    first = np.maximum(x - smoothing, 0)
+    last = np.where(x < smoothing, x + 1, x)
+    return (cumulative[last] - cumulative[first]) / np.maximum(last - first, 1)
+
+
+def rolling_percentiles(reward, smoothing, percentiles, pixels):
+    # percentiles of the last "smoothing" rewards, only calculated at (about) "pixels" positions
+    if len(reward) < smoothing:
+        return np.arange(0), np.zeros((len(percentiles), 0))
+    windows = np.lib.stride_tricks.sliding_window_view(reward, smoothing)
+    step = max(len(windows) // pixels, 1)
+    x = np.arange(0, len(windows), step)
+    return x + smoothing, np.percentile(windows[x], percentiles, axis=1)
+
+
+def downsample(values, pixels):
+    # minimum and maximum of every bucket of values, in the order they are drawn
+    # the last values that do not fill a whole bucket are a bucket of their own
+    bucket = max(len(values) // pixels, 1)
+    n = len(values) // bucket * bucket
+    if bucket == 1:
+        return np.arange(len(values)), values
+    blocks = values[:n].reshape(-1, bucket)
+    x = np.repeat(np.arange(len(blocks)) * bucket + bucket // 2, 2)
+    y = np.column_stack((blocks.min(axis=1), blocks.max(axis=1))).ravel()
+    if n < len(values):
+        tail = values[n:]
+        x = np.append(x, [(n + len(values)) // 2] * 2)
+        y = np.append(y, [tail.min(), tail.max()])
+    return x, y
+
+
+def render(reward, smoothing=1000, pixels=2000, percentiles=(10, 90), baselines=None):
+    fig, ax = plt.subplots(figsize=(21, 9))
+
+    ax.plot(*downsample(reward, pixels), linewidth=0.5)
+    ax.plot(*downsample(rolling_mean(reward, smoothing), pixels), c="red", label='Average reward')
+
+    x, bands = rolling_percentiles(reward, smoothing, percentiles, pixels)
+    if len(x):
+        ax.fill_between(x, bands[0], bands[-1], color="red", alpha=0.2,
+                        label='{}-{}% of the rewards'.format(percentiles[0], percentiles[-1]))
+
+    for level, colour, label in references:
+        ax.axhline(level, c=colour, label=label)
+    # mean rewards of the heuristics, see "cached_baselines()" in Baselines.py
+    for (policy, level), style in zip(sorted((baselines or {}).items()), ("--", "-.", ":")):
+        ax.axhline(level, c="Black", linestyle=style, label=policy)
+
+    ax.set_xlabel("Episodes")
+    ax.set_ylabel("Reward")
+    ax.legend(loc='upper left', frameon=True)
+    return fig
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training curve of a run")
+    parser.add_argument("--log", default="episodes.log")
+    parser.add_argument("--smoothing", type=int, default=1000)
+    parser.add_argument("--pixels", type=int, default=2000, help="resolution of the plotted curves")
+    parser.add_argument("--cache", default="./evaluationCache", help="cache of the evaluation of the heuristics")
+    args = parser.parse_args()
+
+    reward = load_rewards(args.log)
+
+    print(reward.mean())
+    print(reward.mean() ** 0.3333)
+
+    fig = render(reward, args.smoothing, args.pixels, baselines=cached_baselines(args.cache))
+    fig.savefig('update.pdf', transparent=True, bbox_inches='tight')
+    fig.savefig("update.jpg", dpi=150)
+    plt.show()
 
 # 50 -- 2_500 ## bei 6*6
 # 75 -- 7_500
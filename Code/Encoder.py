@@ -0,0 +1,132 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Incremental state encoder
+#
+# "GenerateState()" in Environment.py rebuilds the whole state-vector on every call.
+# The class "StateEncoder" owns a preallocated float32 state-vector with a fixed place (offset) for every element.
+# The simulator writes every change of its state straight into these places, so generating a state is only
+# the normalization of an already existing vector.
+#
+# Two kinds of normalization are possible:
+# "max"     every state is scaled by its own maximum (like "GenerateState()"), the scale changes from step to step
+# "bounds"  every element is scaled by a fixed bound derived from the factory (see "set_bounds()"),
+#           so the same value is always encoded the same way and encoding is one multiply-add
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+
+
+class StateEncoder:
+    """
+    # ##################################################################################################################
+    # Layout of the state-vector (same order as "GenerateState()" in Environment.py):
+    #
+    # ProductDesign            products * machines
+    # ProductBucket            products
+    # EstimatedTimeOfArrival   products * 2
+    # RemainingWorkingTime     machines * 3
+    # Machine_Failure_Counter  machines            (divided by 5 to reduce information suppression)
+    #
+    # "None" is encoded as -1.
+    # For every element there is a view into the vector with the shape of the matrix in the "FactoryState",
+    # e.g. encoder.RemainingWorkingTime[env, machine, 1] is the place of the remaining working time.
+    # ##################################################################################################################
+    """
+
+    def __init__(self, amount_of_products, amount_of_machines, num_envs=1, normalization="max"):
+        if normalization not in ("max", "bounds"):
+            raise ValueError("normalization has to be 'max' or 'bounds', not %r" % normalization)
+
+        P, M, N = amount_of_products, amount_of_machines, num_envs
+        self.amount_of_products = amount_of_products
+        self.amount_of_machines = amount_of_machines
+        self.num_envs = num_envs
+        self.normalization = normalization
+
+        shapes = (("ProductDesign", (P, M)),
+                  ("ProductBucket", (P,)),
+                  ("EstimatedTimeOfArrival", (P, 2)),
+                  ("RemainingWorkingTime", (M, 3)),
+                  ("Machine_Failure_Counter", (M,)))
+
+        self.offsets = {}
+        offset = 0
+        for name, shape in shapes:
+            size = int(np.prod(shape))
+            self.offsets[name] = (offset, offset + size)
+            offset += size
+        self.state_dim = offset
+
+        # raw (not normalized) values and the normalized output, both allocated only once
+        self.raw = np.full((N, self.state_dim), -1, dtype=np.float32)
+        self.state = np.empty((N, self.state_dim), dtype=np.float32)
+        self.top = np.empty((N, 1), dtype=np.float32)
+
+        # views into "raw" with the shape of the matrices
+        for name, shape in shapes:
+            start, end = self.offsets[name]
+            setattr(self, name, self.raw[:, start:end].reshape((N,) + shape))
+
+        # "bounds"-normalization: state = raw * scale + shift, see "set_bounds()"
+        self.scale = np.ones(self.state_dim, dtype=np.float32)
+        self.shift = np.zeros(self.state_dim, dtype=np.float32)
+
+    def set_bounds(self, max_WorkingTime, max_TravelTime, Max_Error_Time):
+        """
+        # ##############################################################################################################
+        # The largest possible value of every element is taken from the configuration of the factory:
+        #
+        # ProductDesign            1
+        # ProductBucket            last machine
+        # EstimatedTimeOfArrival   [last machine, longest travel time]
+        # RemainingWorkingTime     [last product, longest working time, last step]
+        # Machine_Failure_Counter  longest failure (divided by 5 like the counter)
+        #
+        # Every element is mapped from (-1, bound) to (-1, +1).
+        # ##############################################################################################################
+        """
+        P, M = self.amount_of_products, self.amount_of_machines
+
+        bounds = np.concatenate((np.ones(P * M),
+                                 np.full(P, M - 1),
+                                 np.tile([M - 1, max_TravelTime], P),
+                                 np.tile([P - 1, max_WorkingTime, M - 1], M),
+                                 np.full(M, Max_Error_Time / 5)))
+        # a bound of 0 (e.g. only one machine) would divide by zero
+        bounds = np.maximum(bounds, 1)
+
+        self.scale[:] = 2 / (bounds + 1)
+        self.shift[:] = self.scale - 1
+
+    def write(self, name, index, value):
+        # Writes the changed entries of the matrix "name" into their places of the state-vector
+        if name == "Machine_Failure_Counter":
+            value = np.where(np.asarray(value) >= 0, np.asarray(value) / 5, -1)
+        getattr(self, name)[index] = value
+
+    def load(self, state, mask=slice(None)):
+        # Copies the complete "FactoryState" into the vector (after a reset)
+        for name in ("ProductDesign", "ProductBucket", "EstimatedTimeOfArrival", "RemainingWorkingTime",
+                     "Machine_Failure_Counter"):
+            self.write(name, mask, getattr(state, name)[mask])
+
+    def GenerateState(self):
+        """
+        # All elements of the vector are compressed to a scale from -1 to 1
+        # "max":    like np.interp in "GenerateState()", every environment with its own maximum
+        # "bounds": with the fixed bounds of "set_bounds()"
+        # The returned array is reused: it is overwritten by the next call!
+        """
+        if self.normalization == "bounds":
+            np.multiply(self.raw, self.scale, out=self.state)
+            np.add(self.state, self.shift, out=self.state)
+            return self.state
+
+        np.max(self.raw, axis=1, keepdims=True, out=self.top)
+        np.add(self.top, 1, out=self.top)
+        np.add(self.raw, 1, out=self.state)
+        np.divide(self.state, self.top, out=self.state)
+        np.multiply(self.state, 2, out=self.state)
+        np.subtract(self.state, 1, out=self.state)
+        return self.state
@@ -0,0 +1,75 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Append-only log of the episodes
+#
+# The training loop used to pickle the complete list of rewards after every episode, so the amount of written data
+# grew with every episode. "EpisodeLog" appends one fixed-width binary record per episode to a file,
+# collected in a block and written every "flush_interval" episodes.
+# Readers map the file into memory ("read_episodes()") without loading it, also while the training is running.
+
+########################################################################################################################
+# Importing libraries
+import os  # size of the file
+import atexit  # the last records are written when the training is stopped
+import numpy as np  # For mathematical operations
+
+# one record per episode, in this order, without padding (little-endian)
+RECORD = np.dtype([('episode', '<i8'),  # number of the episode
+                   ('reward', '<f8'),  # game reward
+                   ('steps', '<i4'),  # time-steps of the agent
+                   ('duration', '<f4'),  # seconds
+                   ('noise', '<f4'),  # exploration noise at the end of the episode
+                   ('completed', '<i4')])  # completed working-steps at the end of the episode
+
+
+class EpisodeLog:
+    """
+    # ##################################################################################################################
+    # path             file of the log
+    # flush_interval   number of records collected before they are written
+    # append           False == a new log is started, True == the records are appended to an existing log
+    # ##################################################################################################################
+    """
+
+    def __init__(self, path="episodes.log", flush_interval=200, append=False):
+        self.path = path
+        self.block = np.zeros(flush_interval, dtype=RECORD)
+        self.position = 0
+        self.file = open(path, "ab" if append else "wb")
+        atexit.register(self.close)
+
+    def write(self, episode, reward, steps, duration, noise, completed):
+        self.block[self.position] = (episode, reward, steps, duration, noise, completed)
+        self.position += 1
+        if self.position == len(self.block):
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        self.file.write(self.block[:self.position].tobytes())
+        self.file.flush()
+        self.position = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        atexit.unregister(self.close)
+
+
+def read_episodes(path="episodes.log"):
+    # The log as a read-only array of records (a record that is only partly written is left out)
+    n = os.path.getsize(path) // RECORD.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", shape=(n,))
+
+
+def truncate_episodes(path, episode):
+    # Removes the records after "episode", e.g. to continue the log from a checkpoint
+    if not os.path.exists(path):
+        return
+    records = read_episodes(path)
+    n = int(np.count_nonzero(records['episode'] <= episode))
+    del records
+    os.truncate(path, n * RECORD.itemsize)
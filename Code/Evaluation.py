@@ -0,0 +1,211 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Evaluation of a trained agent
+#
+# The saved actor is run without exploration on seeded factories, so two evaluations of the same actor
+# see the same starting positions of the products, failures and random starts (the seed of an episode starts new
+# random streams of the factory, see Streams.py, independent of the process that runs it).
+#
+# "compare_policies()" runs the actor and the heuristics of Heuristics.py (linearFIFO, betterFIFO, random actions)
+# on the same seeded factories, distributed over a pool of processes, and "summarize()" reports the reward,
+# completion rate and makespan of every policy with confidence intervals.
+# The results of the heuristics only depend on the seed and the factory, so they are computed once and cached
+# per seed in "cache" (a later evaluation with more seeds only runs the new ones, see Baselines.py).
+#
+# python MAIN.py evaluate --policies actor linearFIFO betterFIFO random --episodes 5000 [--processes 8]
+
+########################################################################################################################
+# Importing libraries
+import os  # number of cores
+import json  # summary of the comparison
+import statistics  # quantile of the normal distribution
+import numpy as np  # For mathematical operations
+import torch  # for the actor-network in the worker-processes
+import torch.multiprocessing as mp  # pool of worker-processes
+from Agent import TD3, load_actor_state_dict  # importing Agent-Class from other file
+from Factory import Factory  # importing Factory-Class from other file
+from Actions import extract_Actions  # decoding of actions
+from Heuristics import linearFIFO, betterFIFO  # heuristics for comparison with the agent
+from Instance import configure_factory, Capabilities  # manually defined or generated factory, sparse skills
+from Baselines import HEURISTICS, RESULT, cache_file, load_cache, save_cache, cached_baselines  # cache of heuristics
+
+POLICIES = ("actor", "linearFIFO", "betterFIFO", "random")
+
+
+def decide(policy, factory, Policy):
+    # Action of one policy for the current state of the factory
+    if policy == "actor":
+        Action_raw = Policy.select_action(factory.GenerateState())
+        return extract_Actions(Action_raw, factory.amount_of_products, factory.amount_of_machines)
+    if policy == "random":
+        return factory.GenerateRandomAction()
+
+    # the heuristics work on lists like "create_factory()", -1 instead of "None" does not change their decisions
+    ProductBucket, ProductDesign = factory.ProductBucket[0].tolist(), factory.ProductDesign[0].tolist()
+    if policy == "linearFIFO":
+        return np.array(linearFIFO(ProductBucket, ProductDesign))
+    return np.array(betterFIFO(ProductBucket, ProductDesign, available_skills(factory)))
+
+
+def available_skills(factory):
+    # the skills of the machines that are not failed (Machine_Failure_Counter == -1), see "betterFIFO()"
+    skills = factory.skills
+    working = factory.Machine_Failure_Counter[0][skills.machine] < 0
+    if working.all():
+        return skills
+    return Capabilities(skills.machine[working], skills.step[working], skills.working_time[working],
+                        skills.amount_of_machines)
+
+
+def run_episode(factory, policy, seed, max_timesteps, Policy=None):
+    # one seeded episode --> reward, steps, done, completed share of the working-steps
+    factory.reset(seed)  # positions, failures, random start and random actions
+    factory.random_start(10)
+    reward, steps, done = 0.0, 0, bool(factory.done[0])
+
+    while not done and steps < max_timesteps:
+        step_reward, done = factory.step(decide(policy, factory, Policy))
+        reward += step_reward
+        steps += 1
+
+    completed = float((factory.ProductDesign[0] == -1).mean())
+    return reward, steps, done, completed
+
+
+########################################################################################################################
+# Comparison on a pool of processes
+
+worker = {}  # factory and actor of a worker-process, see "initialize_worker()"
+
+
+def initialize_worker(configuration, max_timesteps, normalization, actor_state):
+    # every process builds its own factory once and evaluates many seeds with it
+    torch.set_num_threads(1)
+    WorkingTime, TravelTime, amount_of_products = configure_factory(*configuration)
+    factory = Factory(WorkingTime, TravelTime, amount_of_products, max_timesteps, normalization=normalization)
+    worker.update(factory=factory, max_timesteps=max_timesteps, Policy=None)
+    if actor_state is not None:
+        Policy = TD3(0, factory.encoder.state_dim, amount_of_products * (factory.amount_of_machines + 1), 1)
+        Policy.actor.load_state_dict(actor_state)
+        worker['Policy'] = Policy
+
+
+def evaluate_seeds(task):
+    policy, seeds = task
+    records = np.zeros(len(seeds), dtype=RESULT)
+    for i, seed in enumerate(seeds.tolist()):
+        records[i] = (seed,) + run_episode(worker['factory'], policy, seed, worker['max_timesteps'], worker['Policy'])
+    return policy, records
+
+
+def compare_policies(directory="./inTraining", name="TD3", episodes=1000, max_timesteps=70, normalization="max",
+                     seed=0, amount_of_products=5, amount_of_machines=None, instance_seed=0, policies=POLICIES,
+                     processes=None, cache="./evaluationCache", chunk=50):
+    """
+    # ##################################################################################################################
+    # policies    any of POLICIES, "actor" is the saved actor in directory/name
+    # episodes    the factories of the seeds seed .. seed + episodes - 1, the same ones for every policy
+    # processes   size of the pool, None == all cores, 1 == in this process
+    # cache       folder for the results of the heuristics, None == no cache
+    # chunk       seeds per task of the pool
+    #
+    # Returns {policy: records (RESULT), one per seed, in the order of the seeds}
+    # ##################################################################################################################
+    """
+    configuration = (amount_of_products, amount_of_machines, instance_seed)
+    seeds = np.arange(seed, seed + episodes, dtype=np.int64)
+
+    results = {policy: np.zeros(0, dtype=RESULT) for policy in policies}
+    tasks = []
+    for policy in policies:
+        missing = seeds
+        if policy in HEURISTICS and cache is not None:
+            cached = load_cache(cache_file(cache, policy, configuration, max_timesteps))
+            results[policy] = cached
+            missing = seeds[~np.isin(seeds, cached['seed'])]
+        tasks += [(policy, missing[i:i + chunk]) for i in range(0, len(missing), chunk)]
+
+    if tasks:
+        actor_state = load_actor_state_dict(directory, name) if "actor" in policies else None
+        arguments = (configuration, max_timesteps, normalization, actor_state)
+        if processes == 1:
+            initialize_worker(*arguments)
+            outputs = [evaluate_seeds(task) for task in tasks]
+        else:
+            processes = min(processes or os.cpu_count(), len(tasks))
+            with mp.get_context("spawn").Pool(processes, initialize_worker, arguments) as pool:
+                outputs = list(pool.imap_unordered(evaluate_seeds, tasks))
+        for policy, records in outputs:
+            results[policy] = np.concatenate((results[policy], records))
+
+    for policy in policies:
+        records = np.sort(results[policy], order='seed')
+        if policy in HEURISTICS and cache is not None and len(records):
+            save_cache(cache_file(cache, policy, configuration, max_timesteps), records)
+        results[policy] = records[np.isin(records['seed'], seeds)]
+    return results
+
+
+def confidence_interval(values, confidence=0.95, limits=(-np.inf, np.inf)):
+    # mean and the interval of the normal approximation: mean +- z * standard error, clipped to "limits"
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return float("nan"), float("nan"), float("nan")
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, mean, mean
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * values.std(ddof=1) / np.sqrt(len(values))
+    return mean, float(max(mean - half, limits[0])), float(min(mean + half, limits[1]))
+
+
+def wilson_interval(successes, confidence=0.95):
+    # share of the successes and its Wilson score interval, which stays within [0, 1] and does not collapse to
+    # one point for a share of 0 or 1 (unlike the normal approximation)
+    successes = np.asarray(successes, dtype=bool)
+    n = len(successes)
+    if n == 0:
+        return float("nan"), float("nan"), float("nan")
+    share = float(successes.mean())
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    center = (share + z * z / (2 * n)) / (1 + z * z / n)
+    half = z / (1 + z * z / n) * np.sqrt(share * (1 - share) / n + z * z / (4 * n * n))
+    return share, float(max(center - half, 0.0)), float(min(center + half, 1.0))
+
+
+def summarize(results, confidence=0.95):
+    """
+    # For every policy: (mean, lower, upper) of
+    # reward            game reward of an episode
+    # completion_rate   share of the episodes in which all products were completed
+    # completed_steps   share of the working-steps that were completed at the end of the episode
+    # makespan          time-steps until all products were completed (only the completed episodes)
+    # and the percentiles of the rewards. Without episodes (e.g. no completed one for the makespan) the values are nan.
+    """
+    summary = {}
+    for policy, records in results.items():
+        summary[policy] = {
+            "episodes": len(records),
+            "reward": confidence_interval(records['reward'], confidence),
+            "reward_percentiles": {str(q): float(np.percentile(records['reward'], q)) if len(records) else None
+                                   for q in (5, 25, 50, 75, 95)},
+            "completion_rate": wilson_interval(records['done'], confidence),
+            "completed_steps": confidence_interval(records['completed'], confidence, limits=(0, 1)),
+            "makespan": confidence_interval(records['steps'][records['done']], confidence)}
+    return summary
+
+
+def json_values(value):
+    # nan (no episodes) is not valid JSON, it is written as null
+    if isinstance(value, dict):
+        return {key: json_values(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_values(item) for item in value]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def save_summary(summary, path):
+    with open(path, "w") as file:
+        json.dump(json_values(summary), file, indent=2, allow_nan=False)
@@ -0,0 +1,206 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Event-driven (next-event) factory
+#
+# The tick model ("factory_step()", "Factory") advances the time one unit per step and scans every machine and
+# every product, also when nothing can happen: all products are in a machine or travelling.
+# The action of the agent only matters when a product waits in a bucket (it can be sent or injected).
+# "EventFactory" keeps the completions of the jobs and the arrivals of the products as events with an absolute time
+# in a priority queue and jumps over all ticks in between, straight to the next decision point.
+#
+# The results are the same as with the tick model: the same states, rewards and "done" at every decision point.
+# The failures of the skipped ticks are checked on the same random numbers as the tick model uses them
+# (one uniform number per machine and tick, looked up in the pre-drawn block of Streams.py).
+#
+# Apart from the random numbers of the failures, the cost of a tick only depends on the events and the products in
+# the buckets: the next step of every product and the number of open and finished steps are kept as counters
+# instead of scanning the ProductDesign (products x machines), and the skills are looked up in the sparse table.
+
+########################################################################################################################
+# Importing libraries
+import heapq  # priority queue of the events
+import numpy as np  # For mathematical operations
+from Factory import Factory  # importing Factory-Class from other file
+
+COMPLETION = 0  # a machine finishes its job and ejects the product
+ARRIVAL = 1  # a product arrives at its target machine
+
+
+class EventFactory(Factory):
+    """
+    # ##################################################################################################################
+    # Same interface as "Factory": reset(seed), step(Action) --> reward, done, GenerateState(), random_start()
+    #
+    # The counters of the state (remaining working time, time of arrival, time to recovery) are kept as absolute
+    # times ("due") and turned into the counters of the "FactoryState" only for the state-vector.
+    # A failed machine is available again at its due time, so the recovery needs no event: it never makes a
+    # decision point by itself (a waiting product already does).
+    #
+    # step(Action) executes one tick with the action and then skips all following ticks without a decision.
+    # "step_count" counts the ticks, so it can grow by more than 1 per step. The last tick of an episode
+    # (max_timesteps) is never skipped, it has a reward.
+    # ##################################################################################################################
+    """
+
+    def reset(self, seed=None):
+        Factory.reset(self, seed)
+        M, P = self.amount_of_machines, self.amount_of_products
+
+        self.time = 0  # number of executed ticks, also the skipped ones
+        self.events = []  # (time, kind, machine or product)
+
+        self.job_product = np.full(M, -1, dtype=np.int64)  # product in the machine, -1 == empty
+        self.due_work = np.zeros(M, dtype=np.int64)
+        self.travel_target = np.full(P, -1, dtype=np.int64)  # target of the product, -1 == not travelling
+        self.due_arrival = np.zeros(P, dtype=np.int64)
+        self.due_recovery = np.zeros(M, dtype=np.int64)  # failed as long as due_recovery > time
+
+        # counters of the ProductDesign (sequential working: the first open step is the next one)
+        open_steps = self.ProductDesign[0] == 1
+        self.next_step = np.where(open_steps.any(axis=1), open_steps.argmax(axis=1), M)  # M == all steps done
+        self.open_steps = int(open_steps.sum())
+        self.finished_steps = int((self.ProductDesign[0] == -1).sum())
+        self.waiting = int((self.ProductBucket[0] >= 0).sum())  # products in a bucket
+
+    def tick(self, Action):
+        # one time unit in the order of the tick model: work/eject, travel, send, Induce_Failure, inject
+        self.time += 1
+        T = self.time
+
+        # events of this tick, all completions and all arrivals are written at once
+        due = ([], [])
+        while self.events and self.events[0][0] <= T:
+            t, kind, index = heapq.heappop(self.events)
+            due[kind].append(index)
+        self.waiting += len(due[COMPLETION]) + len(due[ARRIVAL])
+
+        if due[COMPLETION]:
+            machine = np.array(due[COMPLETION])
+            product = self.job_product[machine]
+            step = self.RemainingWorkingTime[0, machine, 2]
+            self.write("ProductDesign", (0, product, step), -1)
+            self.write("ProductBucket", (0, product), machine)
+            self.write("RemainingWorkingTime", (0, machine), -1)
+            self.job_product[machine] = -1
+            for p, s in zip(product.tolist(), step.tolist()):
+                self.complete(p, s)
+
+        if due[ARRIVAL]:
+            product = np.array(due[ARRIVAL])
+            self.write("ProductBucket", (0, product), self.travel_target[product])
+            self.write("EstimatedTimeOfArrival", (0, product), -1)
+            self.travel_target[product] = -1
+
+        # send
+        position = self.ProductBucket[0]
+        product = np.nonzero((Action >= 0) & (position >= 0) & (position != Action))[0]
+        if len(product):
+            target = Action[product]
+            TimeToTarget = self.TravelTime[position[product], target]
+            self.write("EstimatedTimeOfArrival", (0, product, 0), target)
+            self.write("ProductBucket", (0, product), -1)
+            self.travel_target[product] = target
+            self.due_arrival[product] = T + TimeToTarget
+            self.waiting -= len(product)
+            for p, t in zip(product.tolist(), self.due_arrival[product].tolist()):
+                heapq.heappush(self.events, (t, ARRIVAL, p))
+
+        # failures: one random number for every machine, only an empty and functional machine can fail
+        failing = self.streams.uniforms(1)[0, 0] < self.Failure_Prob
+        self.streams.advance(1)
+        failing &= (self.job_product < 0) & (self.due_recovery <= T)
+        self.fail(failing, T)
+
+        # inject: in order of the products, the first product in front of a machine gets it
+        for product in np.nonzero((Action == -1) & (position >= 0))[0].tolist():
+            machine, step = int(position[product]), int(self.next_step[product])
+            if step == self.amount_of_machines:
+                continue
+            WorkingTime = int(self.skills.time(machine, step))
+            # the machine has to be empty, functional and capable of performing the step
+            if self.job_product[machine] < 0 and self.due_recovery[machine] <= T and WorkingTime >= 0:
+                self.write("RemainingWorkingTime", (0, machine, 0), product)
+                self.write("RemainingWorkingTime", (0, machine, 2), step)
+                self.write("ProductBucket", (0, product), -1)
+                self.job_product[machine] = product
+                self.due_work[machine] = T + WorkingTime
+                self.waiting -= 1
+                heapq.heappush(self.events, (int(self.due_work[machine]), COMPLETION, machine))
+
+    def complete(self, product, step):
+        # counters of the finished step, the next step is the next open one of the product
+        self.open_steps -= 1
+        self.finished_steps += 1
+        following = np.nonzero(self.ProductDesign[0, product, step + 1:] == 1)[0]
+        self.next_step[product] = step + 1 + following[0] if len(following) else self.amount_of_machines
+
+    def fail(self, failing, T):
+        n = int(failing.sum())
+        if n:
+            self.due_recovery[failing] = T + self.streams.durations(np.zeros(n, dtype=np.int64))
+
+    def advance(self):
+        """
+        # Skips the ticks up to the next decision point: while no product waits in a bucket, nothing but the
+        # failures can happen until the next completion or arrival.
+        """
+        while not self.done[0] and not self.waiting:
+            next_event = self.events[0][0] if self.events else np.iinfo(np.int64).max
+            idle = min(next_event - self.time - 1, self.max_timesteps - 1 - int(self.step_count[0]))
+            if idle <= 0:
+                return
+
+            # the random numbers of all skipped ticks at once, checked until the first failure
+            uniform = self.streams.uniforms(idle)[:, 0]
+            ticks = self.time + 1 + np.arange(idle)
+            failing = ((uniform < self.Failure_Prob) & (self.job_product < 0)
+                       & (self.due_recovery <= ticks[:, None]))
+            first = np.nonzero(failing.any(axis=1))[0]
+            if len(first):
+                # only the numbers up to the first failure are consumed, like in the tick model
+                idle = int(first[0]) + 1
+                self.fail(failing[idle - 1], self.time + idle)
+
+            self.streams.advance(idle)
+            self.time += idle
+            self.step_count += idle
+
+    def sync(self):
+        # the counters of the state-vector at the current time
+        T = self.time
+        self.write("RemainingWorkingTime", (0, slice(None), 1),
+                   np.where(self.job_product >= 0, self.due_work - T, -1))
+        self.write("EstimatedTimeOfArrival", (0, slice(None), 1),
+                   np.where(self.travel_target >= 0, self.due_arrival - T, -1))
+        self.write("Machine_Failure_Counter", (0, slice(None)),
+                   np.where(self.due_recovery > T, self.due_recovery - T, -1))
+
+    def calculate_reward(self):
+        # same rules as VecFactory.calculate_reward(), from the counters instead of the ProductDesign
+        step = int(self.step_count[0])
+        completed = self.open_steps == 0
+        reward = float(self.max_timesteps - step) ** 3 if completed else 0.0
+        if completed or self.max_timesteps == step + 1:
+            reward += float(self.finished_steps - self.pre_done[0]) ** 3
+        return np.array([reward]), np.array([completed])
+
+    def step(self, Action, advance=True):
+        Action = np.asarray(Action).reshape(self.amount_of_products)
+        self.tick(Action)
+
+        reward, self.done = self.calculate_reward()
+        self.step_count += 1
+
+        if advance:
+            self.advance()
+        self.sync()
+        return reward[0], bool(self.done[0])
+
+    def random_start(self, random_steps_before_takeover=10):
+        # the random steps are single ticks like in the tick model, then the agent takes over at a decision point
+        for x in range(random_steps_before_takeover):
+            self.step(self.GenerateRandomAction(), advance=False)
+        self.step_count[:] = 0
+        self.pre_done[:] = self.finished_steps
+        self.advance()
+        self.sync()
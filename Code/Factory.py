@@ -0,0 +1,162 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Single factory with reusable template
+#
+# The training loop used to call "create_factory()" at the start of every episode.
+# The class "Factory" is created once: the static topology (WorkingTime, TravelTime) is kept as a template
+# and every episode only calls "reset()", which re-randomises the ProductBucket and clears the dynamic state in place.
+#
+# With a single environment the masked array operations of "VecFactory" cost more than they save: every phase is a
+# handful of NumPy calls on arrays of 5 elements. "Factory" executes the phases with scalar loops over the rows of the
+# single environment instead (same rules, same random numbers, so a "Factory" makes the same episodes as environment 0
+# of a "VecFactory" with the same seed).
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+from Simulator import VecFactory  # importing batched simulator from other file
+
+
+class Factory(VecFactory):
+    """
+    # ##################################################################################################################
+    # A "VecFactory" with a single environment.
+    # Actions, rewards and states are handled without the environment dimension:
+    #
+    # step(Action)      Action as returned by "extract_Actions()" --> reward, done
+    # GenerateState()   state vector like "GenerateState()" in Environment.py (reused, overwritten by the next call)
+    # reset(seed)       new episode, optionally with new streams of random numbers from "seed" (positions of the
+    #                   products, failures and random actions, see Streams.py)
+    # ##################################################################################################################
+    """
+
+    def __init__(self, WorkingTime, TravelTime, amount_of_products, max_timesteps=70, **parameters):
+        # "parameters" of the failures, the normalization and the seed are passed on to "VecFactory"
+        VecFactory.__init__(self, WorkingTime, TravelTime, amount_of_products, 1, max_timesteps, **parameters)
+
+        # the static topology as lists for the scalar phases, -1 == not capable
+        self.travel_times = self.TravelTime.tolist()
+        self.working_times = self.skills.dense().tolist()
+
+        # the matrices of the single environment and their places in the state-vector (views)
+        self.rows = {name: (getattr(self, name)[0], getattr(self.encoder, name)[0])
+                     for name in ("ProductDesign", "ProductBucket", "EstimatedTimeOfArrival", "RemainingWorkingTime",
+                                  "Machine_Failure_Counter")}
+
+    def reset(self, seed=None):
+        # only the position of the products is randomised, everything else is cleared in place
+        if seed is not None:
+            self.streams.seed([0], [seed])
+        self.state.reset(ProductBucket=self.streams.positions([0])[0])
+        self.encoder.load(self.state)
+        self.done[:] = False
+
+    def work(self):
+        RWT, vector = self.rows["RemainingWorkingTime"]
+        for machine, (product, time_left, step) in enumerate(RWT.tolist()):
+            if time_left > 0:
+                # reduce working time by 1, if it reaches 0 it is set to -1 (None)
+                RWT[machine, 1] = vector[machine, 1] = time_left - 1 if time_left > 1 else -1
+
+    def eject(self):
+        RWT, vector = self.rows["RemainingWorkingTime"]
+        PD, PD_vector = self.rows["ProductDesign"]
+        PB, PB_vector = self.rows["ProductBucket"]
+        for machine, (product, time_left, step) in enumerate(RWT.tolist()):
+            if product >= 0 and time_left < 0:
+                RWT[machine, 0] = vector[machine, 0] = -1
+                RWT[machine, 2] = vector[machine, 2] = -1
+                PD[product, step] = PD_vector[product, step] = -1  # set completed step in PD to -1 (None)
+                PB[product] = PB_vector[product] = machine  # set position in PB to machine (eject product)
+
+    def travel(self):
+        ETA, vector = self.rows["EstimatedTimeOfArrival"]
+        PB, PB_vector = self.rows["ProductBucket"]
+        for product, (target, time_left) in enumerate(ETA.tolist()):
+            if time_left > 0:
+                ETA[product, 1] = vector[product, 1] = time_left - 1
+                if time_left == 1:
+                    # Set Position of product to target-machine
+                    PB[product] = PB_vector[product] = target
+                    ETA[product] = vector[product] = -1
+
+    def send(self, Action):
+        ETA, vector = self.rows["EstimatedTimeOfArrival"]
+        PB, PB_vector = self.rows["ProductBucket"]
+        for product, (signal, position) in enumerate(zip(Action, PB.tolist())):
+            if signal >= 0 and position >= 0 and position != signal:
+                ETA[product, 0] = vector[product, 0] = signal
+                ETA[product, 1] = vector[product, 1] = self.travel_times[position][signal]
+                PB[product] = PB_vector[product] = -1
+
+    def Induce_Failure(self):
+        MFC, vector = self.rows["Machine_Failure_Counter"]
+        for machine, counter in enumerate(MFC.tolist()):
+            if counter > 0:
+                # time to recovery is reached at 0, skills are available again
+                counter = counter - 1 if counter > 1 else -1
+                MFC[machine] = counter
+                vector[machine] = counter / 5 if counter >= 0 else -1
+
+        # the same random numbers as environment 0 of a "VecFactory", only the few candidates are checked in Python
+        uniform = self.streams.uniforms(1)[0, 0]
+        self.streams.advance(1)
+        RWT = self.rows["RemainingWorkingTime"][0]
+        failing = [machine for machine in np.flatnonzero(uniform < self.Failure_Prob).tolist()
+                   if RWT[machine, 1] < 0 and MFC[machine] < 0]
+        if failing:
+            for machine, Error_Time in zip(failing, self.streams.durations(np.zeros(len(failing), dtype=np.int64))
+                                           .tolist()):
+                MFC[machine] = Error_Time
+                vector[machine] = Error_Time / 5
+
+    def inject(self, Action):
+        RWT, vector = self.rows["RemainingWorkingTime"]
+        PB, PB_vector = self.rows["ProductBucket"]
+        PD = self.rows["ProductDesign"][0]
+        MFC = self.rows["Machine_Failure_Counter"][0]
+        # in order of the products: the first product in front of a machine gets it
+        for product, (signal, machine) in enumerate(zip(Action, PB.tolist())):
+            if signal != -1 or machine < 0:
+                continue
+            design = PD[product].tolist()
+            if 1 not in design:
+                continue
+            step = design.index(1)  # first necessary working-step == Sequential working
+            WorkingTime = self.working_times[machine][step]
+            # the machine has to be empty, functional and capable of performing the step
+            if RWT[machine, 0] < 0 and MFC[machine] < 0 and WorkingTime >= 0:
+                RWT[machine] = vector[machine] = (product, WorkingTime, step)
+                PB[product] = PB_vector[product] = -1
+
+    def calculate_reward(self):
+        # same rules as "VecFactory.calculate_reward()" for the single environment
+        PD = self.rows["ProductDesign"][0]
+        step = int(self.step_count[0])
+        completed = not (PD == 1).any()
+        reward = float(self.max_timesteps - step) ** 3 if completed else 0.0
+        if completed or self.max_timesteps == step + 1:
+            reward += float(int((PD == -1).sum()) - int(self.pre_done[0])) ** 3
+        return reward, completed
+
+    def step(self, Action):
+        # the phases of "VecFactory.step()" on the single environment, Action (products) as a list of signals
+        Action = np.asarray(Action).reshape(self.amount_of_products).tolist()
+
+        self.work()
+        self.eject()
+        self.travel()
+        self.send(Action)
+        self.Induce_Failure()
+        self.inject(Action)
+
+        reward, done = self.calculate_reward()
+        self.done[0] = done
+        self.step_count[0] += 1
+        return reward, done
+
+    def GenerateRandomAction(self):
+        return VecFactory.GenerateRandomAction(self)[0]
+
+    def GenerateState(self):
+        return VecFactory.GenerateState(self)[0]
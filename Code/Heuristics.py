@@ -0,0 +1,90 @@
+"""
+MIT License
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Jan Nalivaika
+#
+# IG : @jannalivaika
+# YT : Jan Nalivaika
+# SC : @jannalivaika
+# LinkedIn : Jan Nalivaika
+# Mail : jan.nalivaika@siemens.com
+# Mail : nalivaika@outlook.de
+
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Heuristics
+#
+# Simple rules to dispatch the products, for comparison with the agent.
+# They work on the lists of "create_factory()" (see Environment.py).
+# "betterFIFO()" also takes the skills as "Capabilities" (see Instance.py), for factories of any size.
+# The evaluation passes only the skills of the machines that are not failed (see "available_skills()" in Evaluation.py).
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+from Instance import Capabilities  # sparse table of the skills
+
+
+def GenerateRandomAction(WorkingTime, ProductDesign):
+    # generating a random Action for every product
+    Action = np.random.randint(-1, len(WorkingTime), len(ProductDesign))  #
+    return Action
+
+
+def linearFIFO(ProductBucket, ProductDesign):
+    """ ONLY WORKS WITH DIAGONAL MATRIX """
+    Action = []  # create empty list
+    for x in range(len(ProductBucket)):  # loop over prodructs
+        if 1 in ProductDesign[x]:  # if product still requires a processing step
+            target = ProductDesign[x].index(1)  # find target machine
+            Action.append(target)  # append to list "Action"
+            if Action[x] == ProductBucket[x]:  # if Position = Target Machine
+                Action[x] = -1  # Overwrite action to "Inject"
+        else:
+            Action.append(-1)  # if product does not require a processing step, inject signal
+
+    return Action
+
+
+def betterFIFO(ProductBucket, ProductDesign, WorkingTime):
+    """
+    # The product is sent to the capable machine closest to the machine of its next step:
+    # the machine of the step itself, then the one before, then the one after, then two before ...
+    # (On the manually defined matrix these are the same decisions as the old rule that only looked at the neighbours.)
+    """
+    skills = Capabilities.from_matrix(WorkingTime)
+
+    Action = []  # create empty list
+    for x in range(len(ProductBucket)):
+        if 1 in ProductDesign[x]:
+            target = list(ProductDesign[x]).index(1)
+            capable = [machine for machine, time in skills[target]]
+            # no capable machine: the product is sent to the machine of the step, like before
+            Action.append(min(capable, key=lambda machine: (abs(machine - target), machine), default=target))
+
+            if Action[x] == ProductBucket[x]:
+                Action[x] = -1
+
+        else:
+            Action.append(-1)
+
+    return Action
+
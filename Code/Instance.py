@@ -0,0 +1,139 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Parametric factory instances
+#
+# "create_factory()" in Environment.py generates a factory with 5 machines and then overwrites it with the manually
+# defined matrices. "generate_factory()" creates factories of any size (e.g. 40 - 200 machines and hundreds of
+# products) from a seed, with the same rules as "create_WorkingTime()" and "create_TravelTime()".
+#
+# The skills of the machines are stored as a sparse table ("Capabilities"): for every step the list of
+# (machine, working time) instead of a dense machines x steps matrix that is mostly "None".
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+from Environment import create_factory  # reference implementation of the factory
+
+
+class Capabilities:
+    """
+    # ##################################################################################################################
+    # Sparse WorkingTime: one entry per skill, sorted by step and machine.
+    # Like in the WorkingTime-matrix there are as many steps as machines.
+    #
+    # capabilities[step]             [(machine, time), ...]  all machines capable of performing the step
+    # capabilities.time(machine, step)  working time, -1 == machine can not perform the step (also for arrays)
+    # capabilities.dense()           the WorkingTime-matrix with -1 as "None"
+    #
+    # Example (WorkingTime-matrix, row == machine, column == step):
+    # [2,    5,    None]          step 0: [(0, 2), (1, 10)]
+    # [10,   2,    None]   --->   step 1: [(0, 5), (1, 2)]
+    # [None, None, 3   ]          step 2: [(2, 3)]
+    # ##################################################################################################################
+    """
+
+    def __init__(self, machine, step, time, amount_of_machines):
+        machine, step, time = (np.asarray(x, dtype=np.int64) for x in (machine, step, time))
+        order = np.lexsort((machine, step))
+        self.amount_of_machines = amount_of_machines
+        self.machine = machine[order]
+        self.step = step[order]
+        self.working_time = time[order].astype(np.int16)
+
+        # the skills of step s are the entries offsets[s]:offsets[s + 1]
+        self.offsets = np.searchsorted(self.step, np.arange(amount_of_machines + 1))
+        # sorted key of every skill for the lookup of (machine, step)
+        self.keys = self.step * amount_of_machines + self.machine
+
+    @classmethod
+    def from_matrix(cls, WorkingTime):
+        # WorkingTime as lists with "None" (see "create_WorkingTime()") or as an array with -1
+        if isinstance(WorkingTime, Capabilities):
+            return WorkingTime
+        WT = np.array([[-1 if t is None else t for t in row] for row in WorkingTime], dtype=np.int64)
+        machine, step = np.nonzero(WT >= 0)
+        return cls(machine, step, WT[machine, step], len(WT))
+
+    def __len__(self):
+        return self.amount_of_machines
+
+    def __getitem__(self, step):
+        start, end = self.offsets[step], self.offsets[step + 1]
+        return list(zip(self.machine[start:end].tolist(), self.working_time[start:end].tolist()))
+
+    def time(self, machine, step):
+        # binary search in the sorted keys, works on single indexes and on arrays
+        key = np.asarray(step, dtype=np.int64) * self.amount_of_machines + machine
+        if not len(self.keys):
+            return np.full(np.shape(key), -1, dtype=np.int16)
+        index = np.minimum(np.searchsorted(self.keys, key), len(self.keys) - 1)
+        return np.where(self.keys[index] == key, self.working_time[index], np.int16(-1))
+
+    def max_time(self):
+        return int(self.working_time.max()) if len(self.working_time) else 0
+
+    def dense(self):
+        WT = np.full((self.amount_of_machines, self.amount_of_machines), -1, dtype=np.int16)
+        WT[self.machine, self.step] = self.working_time
+        return WT
+
+
+def generate_factory(amount_of_machines=40, min_workingtime=2, max_workingtime=3, min_transportationtime=2,
+                     max_transportationtime=4, amount_of_machines_with_multiple_skills=0,
+                     amount_of_extra_skills_on_over_skilled_machines=0, skill_range=None, seed=None):
+    """
+    # ##################################################################################################################
+    # Returns the skills ("Capabilities") and the TravelTime-matrix (array, -1 on the diagonal) of a new factory.
+    #
+    # Like "create_WorkingTime()": machine x performs step x in min_workingtime..max_workingtime time units,
+    # "amount_of_machines_with_multiple_skills" machines get "amount_of_extra_skills_on_over_skilled_machines" extra
+    # steps each, 5 to 10 time units slower than the original machine of the step.
+    # skill_range   an extra skill is at most this many steps away from the own step, None == any step
+    #
+    # Like "create_TravelTime()" every travel time is drawn from min_transportationtime..max_transportationtime - 1
+    # (the upper limit is excluded like in "np.random.randint()").
+    # The amount of products is not part of the factory, it is given to the simulator.
+    # ##################################################################################################################
+    """
+    M = amount_of_machines
+    rng = np.random.default_rng(seed)
+
+    machine = np.arange(M)
+    step = np.arange(M)
+    time = rng.integers(min_workingtime, max_workingtime + 1, M)
+
+    # extra skills: (over-skilled machine, step) pairs, without the own step and without duplicates
+    over_skilled = rng.choice(M, min(amount_of_machines_with_multiple_skills, M), replace=False)
+    extra = amount_of_extra_skills_on_over_skilled_machines
+    if len(over_skilled) and extra:
+        if skill_range is None:
+            extra_step = rng.integers(0, M, (len(over_skilled), extra))
+        else:
+            extra_step = over_skilled[:, None] + rng.integers(-skill_range, skill_range + 1, (len(over_skilled), extra))
+        extra_machine = np.repeat(over_skilled, extra)
+        extra_step = extra_step.ravel()
+        valid = (extra_step >= 0) & (extra_step < M) & (extra_step != extra_machine)
+        pairs = np.unique(np.column_stack((extra_machine[valid], extra_step[valid])), axis=0)
+        extra_time = time[pairs[:, 1]] + rng.integers(5, 11, len(pairs))
+
+        machine = np.concatenate((machine, pairs[:, 0]))
+        step = np.concatenate((step, pairs[:, 1]))
+        time = np.concatenate((time, extra_time))
+
+    TravelTime = rng.integers(min_transportationtime, max_transportationtime, (M, M)).astype(np.int16)
+    np.fill_diagonal(TravelTime, -1)
+
+    return Capabilities(machine, step, time, M), TravelTime
+
+
+def configure_factory(amount_of_products=5, amount_of_machines=None, seed=0):
+    """
+    # The static part of the factory for training and evaluation: WorkingTime, TravelTime, amount_of_products
+    # amount_of_machines   None == the manually defined factory of "create_factory()",
+    #                      otherwise a factory of "generate_factory()" with the seed "seed" (same seed == same factory)
+    """
+    if amount_of_machines is None:
+        factory = create_factory(amount_of_products)
+        return factory[1], factory[2], amount_of_products
+    skills, TravelTime = generate_factory(amount_of_machines, seed=seed)
+    return skills, TravelTime, amount_of_products
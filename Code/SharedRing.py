@@ -0,0 +1,116 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Shared-memory transport of transitions
+#
+# Sending transitions through a multiprocessing-queue pickles every one of them.
+# "TransitionRing" is a ring of fixed-width records in "multiprocessing.shared_memory" with exactly one writer
+# (an actor-process) and one reader (the learner). No lock is needed: the writer only moves "head",
+# the reader only moves "tail". The reader hands the records to the replay buffer directly out of the shared memory.
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+import time  # to wait for free space
+from multiprocessing import shared_memory  # memory shared by the processes
+from multiprocessing import resource_tracker  # cleans up the shared memory of finished processes
+
+
+class TransitionRing:
+    """
+    # ##################################################################################################################
+    # Layout of the shared memory:
+    #
+    # header   2 x uint64            head (records written), tail (records read), both only increasing
+    # records  capacity x width      float32, one transition per row:
+    #                                [state (state_dim), action (action_dim), reward, next_state (state_dim), done]
+    #
+    # The learner creates the ring (create=True), the actor-process attaches to it by its name.
+    # ##################################################################################################################
+    """
+
+    def __init__(self, state_dim, action_dim, capacity=4096, name=None, create=False):
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        self.capacity = capacity
+        self.width = 2 * state_dim + action_dim + 2
+
+        size = 16 + capacity * self.width * 4
+        self.memory = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self.memory.name
+        self.owner = create
+        if not create:
+            # only the learner unlinks the memory: an attached actor-process is not tracked, otherwise the
+            # resource tracker would unlink the ring when the process finishes (and warn about a leak)
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+
+        self.header = np.ndarray((2,), dtype=np.uint64, buffer=self.memory.buf, offset=0)
+        self.records = np.ndarray((capacity, self.width), dtype=np.float32, buffer=self.memory.buf, offset=16)
+        if create:
+            self.header[:] = 0
+
+        # columns of the record
+        S, A = state_dim, action_dim
+        self.columns = (slice(0, S), slice(S, S + A), S + A, slice(S + A + 1, 2 * S + A + 1), 2 * S + A + 1)
+
+    def put(self, state, action, reward, next_state, done, stop=None):
+        """
+        # Writer: copies n transitions (one row each) into the ring.
+        # More transitions than the ring holds are written in parts of at most "capacity" rows.
+        # Waits while the ring is full, or returns False if "stop" is set in the meantime.
+        """
+        for begin in range(0, len(reward), self.capacity):
+            part = slice(begin, begin + self.capacity)
+            if not self.put_part(state[part], action[part], reward[part], next_state[part], done[part], stop):
+                return False
+        return True
+
+    def put_part(self, state, action, reward, next_state, done, stop):
+        n = len(reward)
+        head = int(self.header[0])
+        while head + n - int(self.header[1]) > self.capacity:
+            if stop is not None and stop.is_set():
+                return False
+            time.sleep(0.0005)
+
+        rows = (head + np.arange(n)) % self.capacity
+        s, a, r, s_, d = self.columns
+        self.records[rows, s] = state
+        self.records[rows, a] = action
+        self.records[rows, r] = reward
+        self.records[rows, s_] = next_state
+        self.records[rows, d] = done
+
+        # the records are complete before "head" is moved, only then the reader will see them
+        self.header[0] = head + n
+        return True
+
+    def drain(self, replay_buffer):
+        """
+        # Reader: moves all written records into the replay buffer ("add_batch") and returns their number.
+        # The records are passed as views of the shared memory, at most two blocks (before and after the wrap).
+        """
+        head = int(self.header[0])
+        tail = int(self.header[1])
+        n = head - tail
+        if n == 0:
+            return 0
+
+        start = tail % self.capacity
+        s, a, r, s_, d = self.columns
+        for begin, end in ((start, min(start + n, self.capacity)), (0, max(start + n - self.capacity, 0))):
+            if end > begin:
+                block = self.records[begin:end]
+                replay_buffer.add_batch(block[:, s], block[:, a], block[:, r], block[:, s_], block[:, d])
+
+        self.header[1] = head
+        return n
+
+    def close(self):
+        # views on the shared memory have to be deleted before it can be closed
+        del self.header, self.records
+        self.memory.close()
+        if self.owner:
+            # a spawned actor-process shares the resource tracker of the learner, so its "unregister()" removed the
+            # ring from the tracker: registered again, otherwise "unlink()" makes the tracker report a KeyError
+            resource_tracker.register(self.memory._name, "shared_memory")
+            self.memory.unlink()
@@ -0,0 +1,233 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Batched factory simulator
+#
+# "factory_step()" in Environment.py advances exactly one factory by walking lists of lists.
+# The class "VecFactory" holds the state of "num_envs" factories in NumPy-arrays and advances all of them at once.
+# Every phase of "factory_step()" (work, eject, travel, send, Induce_Failure, inject) is implemented as a masked
+# array operation over all environments. The rules of the single factory are kept exactly.
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+from State import FactoryState  # importing State-Class from other file
+from Encoder import StateEncoder  # importing Encoder-Class from other file
+from Streams import RandomStreams  # seeded random numbers of every environment
+
+
+class VecFactory:
+    """
+    # ##################################################################################################################
+    # The state of all environments is stored in one "FactoryState" (see State.py):
+    # all matrices of "create_factory()" get an additional first dimension, the environment index,
+    # and "None" is replaced by -1 (sentinel), because arrays can not hold "None".
+    #
+    # A failed machine keeps its skills in "WorkingTime" and is masked with "Machine_Failure_Counter"
+    # instead of deleting and restoring the skills with "Machine_Failure_Info".
+    #
+    # seed   root seed of the random numbers (int, None == new every run, or a "SeedSequence"), every environment
+    #        draws the positions, the failures and the random actions from its own streams (see Streams.py)
+    # ##################################################################################################################
+    """
+
+    def __init__(self, WorkingTime, TravelTime, amount_of_products, num_envs=256, max_timesteps=70,
+                 Failure_Prob=0.025, Min_Error_Time=40, Max_Error_Time=70, normalization="max", seed=None):
+
+        self.amount_of_machines = len(WorkingTime)
+        self.amount_of_products = amount_of_products
+        self.num_envs = num_envs
+        self.max_timesteps = max_timesteps
+
+        self.Failure_Prob = Failure_Prob  # representing the possibility of failure for EVERY machine
+        self.Min_Error_Time = Min_Error_Time  # min time of Failure
+        self.Max_Error_Time = Max_Error_Time  # max time of Failure
+
+        self.state = FactoryState(WorkingTime, TravelTime, amount_of_products, num_envs)
+
+        # short names for the arrays of the state (views, no copies)
+        self.skills = self.state.skills
+        self.TravelTime = self.state.TravelTime
+        self.ProductDesign = self.state.ProductDesign
+        self.ProductBucket = self.state.ProductBucket
+        self.EstimatedTimeOfArrival = self.state.EstimatedTimeOfArrival
+        self.RemainingWorkingTime = self.state.RemainingWorkingTime
+        self.Machine_Failure_Counter = self.state.Machine_Failure_Counter
+        self.step_count = self.state.step  # "step" of the training loop, one per environment
+        self.pre_done = self.state.pre_done  # steps finished before the agent took over
+
+        self.done = np.zeros(num_envs, dtype=bool)
+
+        # state-vector that is updated with every change of the state
+        # normalization "max" like "GenerateState()" or "bounds" derived from the factory, see Encoder.py
+        self.encoder = StateEncoder(amount_of_products, self.amount_of_machines, num_envs, normalization)
+        self.encoder.set_bounds(self.skills.max_time(), int(self.TravelTime.max()), Max_Error_Time)
+
+        self.streams = RandomStreams(num_envs, self.amount_of_machines, amount_of_products, Min_Error_Time,
+                                     Max_Error_Time, seed)
+
+        self.reset()
+
+    def reset(self, mask=None, seeds=None):
+        # Resets all environments, or only those where "mask" is True (e.g. the ones that are done)
+        # seeds   optionally one seed per reset environment: the environment starts new streams of random numbers
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        envs = np.nonzero(mask)[0]
+        if len(envs) == 0:
+            return
+        if seeds is not None:
+            self.streams.seed(envs, seeds)
+
+        # To make it harder for the Agent the position of the products is randomised (see create_ProductBucket())
+        self.state.reset(mask, self.streams.positions(envs))
+        self.encoder.load(self.state, mask)
+        self.done[mask] = False
+
+    def write(self, name, index, value):
+        # every change of the state is written into the state and into its place of the state-vector
+        getattr(self, name)[index] = value
+        self.encoder.write(name, index, value)
+
+    def work(self):
+        # reduce working time by 1, if it reaches 0 it is set to -1 (None)
+        env, machine = np.nonzero(self.RemainingWorkingTime[:, :, 1] > 0)
+        time_left = self.RemainingWorkingTime[env, machine, 1] - 1
+        time_left[time_left == 0] = -1
+        self.write("RemainingWorkingTime", (env, machine, 1), time_left)
+
+    def eject(self):
+        # every machine holding a product without remaining time ejects it
+        env, machine = np.nonzero((self.RemainingWorkingTime[:, :, 0] >= 0) & (self.RemainingWorkingTime[:, :, 1] < 0))
+        product = self.RemainingWorkingTime[env, machine, 0]
+        step = self.RemainingWorkingTime[env, machine, 2]
+        self.write("RemainingWorkingTime", (env, machine, 0), -1)
+        self.write("RemainingWorkingTime", (env, machine, 2), -1)
+        self.write("ProductDesign", (env, product, step), -1)  # set completed step in PD to -1 (None)
+        self.write("ProductBucket", (env, product), machine)  # set position in PB to machine (eject product)
+
+    def travel(self):
+        env, product = np.nonzero(self.EstimatedTimeOfArrival[:, :, 1] > 0)
+        time_left = self.EstimatedTimeOfArrival[env, product, 1] - 1
+        self.write("EstimatedTimeOfArrival", (env, product, 1), time_left)
+
+        # Products that have arrived
+        arrived = time_left == 0
+        env, product = env[arrived], product[arrived]
+        # Set Position of product to target-machine
+        self.write("ProductBucket", (env, product), self.EstimatedTimeOfArrival[env, product, 0])
+        self.write("EstimatedTimeOfArrival", (env, product), -1)
+
+    def send(self, Action):
+        # a product is sent if the signal is >= 0, it is in a bucket and it is not already at the target
+        position = self.ProductBucket
+        env, product = np.nonzero((Action >= 0) & (position >= 0) & (position != Action))
+        target = Action[env, product]
+        TimeToTarget = self.TravelTime[position[env, product], target]
+        self.write("EstimatedTimeOfArrival", (env, product, 0), target)
+        self.write("EstimatedTimeOfArrival", (env, product, 1), TimeToTarget)
+        self.write("ProductBucket", (env, product), -1)
+
+    def Induce_Failure(self):
+        MFC = self.Machine_Failure_Counter
+        env, machine = np.nonzero(MFC > 0)
+        time_left = MFC[env, machine] - 1
+        time_left[time_left == 0] = -1  # time to recovery is reached, skills are available again
+        self.write("Machine_Failure_Counter", (env, machine), time_left)
+
+        # one random number for every machine in every environment, taken from the pre-drawn block
+        failing = self.streams.uniforms(1)[0] < self.Failure_Prob
+        self.streams.advance(1)
+        # Failure is only possible if the machine is empty and functional
+        failing &= (self.RemainingWorkingTime[:, :, 1] < 0) & (MFC < 0)
+        env, machine = np.nonzero(failing)
+        if len(env):
+            self.write("Machine_Failure_Counter", (env, machine), self.streams.durations(env))
+
+    def inject(self, Action):
+        PD = self.ProductDesign
+        position = self.ProductBucket
+
+        # first necessary working-step == Sequential working
+        open_steps = PD == 1
+        Step = open_steps.argmax(axis=2)
+
+        candidate = (Action == -1) & (position >= 0) & open_steps.any(axis=2)
+        env, product = np.nonzero(candidate)
+        machine = position[env, product]
+        step = Step[env, product]
+        WorkingTime = self.skills.time(machine, step)
+
+        # the machine has to be empty, functional and capable of performing the step
+        possible = ((self.RemainingWorkingTime[env, machine, 0] < 0) & (self.Machine_Failure_Counter[env, machine] < 0)
+                    & (WorkingTime >= 0))
+        env, product, machine, step = env[possible], product[possible], machine[possible], step[possible]
+        WorkingTime = WorkingTime[possible]
+
+        # Products are injected in order of their index, so if several products wait in front of the same machine
+        # the one with the lowest index gets the machine (like the loop in "inject()").
+        first = np.full((self.num_envs, self.amount_of_machines), self.amount_of_products, dtype=np.int64)
+        np.minimum.at(first, (env, machine), product)
+        winner = first[env, machine] == product
+        env, product, machine, step = env[winner], product[winner], machine[winner], step[winner]
+
+        self.write("RemainingWorkingTime", (env, machine, 0), product)
+        self.write("RemainingWorkingTime", (env, machine, 1), WorkingTime[winner])
+        self.write("RemainingWorkingTime", (env, machine, 2), step)
+        self.write("ProductBucket", (env, product), -1)
+
+    def calculate_reward(self):
+        # same rules as "calculate_reward()" in Environment.py
+        step = self.step_count
+        finished = (self.ProductDesign == -1).sum(axis=(1, 2))
+        completed = ~(self.ProductDesign == 1).any(axis=(1, 2))
+
+        reward = np.zeros(self.num_envs, dtype=np.float64)
+        reward[completed] = (self.max_timesteps - step[completed]).astype(np.float64) ** 3
+        last = completed | (self.max_timesteps == step + 1)
+        reward[last] += (finished[last] - self.pre_done[last]).astype(np.float64) ** 3
+
+        return reward, completed
+
+    def step(self, Action):
+        """
+        # ##############################################################################################################
+        # Action is a matrix (num_envs, products) of signals as returned by "extract_Actions()"
+        # -1 == inject , 0..machines-1 == send to machine
+        #
+        # Returns the reward and the "done" indicator for every environment.
+        # Environments that are done (or reached max_timesteps) have to be reset by the caller with reset(mask)
+        # ##############################################################################################################
+        """
+        Action = np.asarray(Action).reshape(self.num_envs, self.amount_of_products)
+
+        self.work()
+        self.eject()
+        self.travel()
+        self.send(Action)
+        self.Induce_Failure()
+        self.inject(Action)
+
+        reward, self.done = self.calculate_reward()
+        self.step_count += 1
+
+        return reward, self.done
+
+    def random_start(self, random_steps_before_takeover=10):
+        # to generate a random starting state, some random steps are performed before the Agent takes over
+        # (like in the training loop, these steps do not count and finished steps are remembered in "pre_done")
+        for x in range(random_steps_before_takeover):
+            self.step(self.GenerateRandomAction())
+        self.step_count[:] = 0
+        self.pre_done[:] = (self.ProductDesign == -1).sum(axis=(1, 2))
+
+    def GenerateRandomAction(self):
+        # generating a random Action for every product in every environment
+        return self.streams.actions()
+
+    def GenerateState(self):
+        """
+        # Same layout and normalization as "GenerateState()" in Environment.py, one row per environment.
+        # The state-vector is kept up to date by the phases, see Encoder.py.
+        # The returned array is reused: it is overwritten by the next call!
+        """
+        return self.encoder.GenerateState()
@@ -0,0 +1,118 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Compact factory state
+#
+# "create_factory()" in Environment.py builds nested Python lists that use "None" as "empty".
+# "FactoryState" holds the same information in preallocated typed NumPy-arrays with -1 as "empty".
+# The arrays are allocated once; "reset()" and "copy()" only write into the existing memory.
+
+########################################################################################################################
+# Importing libraries
+import numpy as np  # For mathematical operations
+from Instance import Capabilities  # sparse table of the skills
+
+
+class FactoryState:
+    """
+    # ##################################################################################################################
+    # Every dynamic matrix has a leading dimension for the environment (num_envs = 1 for a single factory).
+    # -1 is the sentinel for "None".
+    #
+    # skills                  Capabilities                          step --> [(machine, working time), ...]
+    # TravelTime              int16 (machines, machines)            -1 on the diagonal
+    # ProductDesign           int8  (num_envs, products, machines)  1 == step necessary, -1 == step done
+    # ProductBucket           int16 (num_envs, products)            position of the product, -1 == not in a bucket
+    # EstimatedTimeOfArrival  int16 (num_envs, products, 2)         [target, ETA], -1 == stationary
+    # RemainingWorkingTime    int16 (num_envs, machines, 3)         [product, remaining time, step], -1 == empty
+    # Machine_Failure_Counter int16 (num_envs, machines)            time to recovery, -1 == able to work
+    # step, pre_done          int32 (num_envs)                      counters of the training loop
+    #
+    # The skills and TravelTime are static and shared by all environments.
+    # "WorkingTime" can be given as the matrix of "create_factory()" or as "Capabilities" (see Instance.py).
+    # "Machine_Failure_Info" is not stored: the skills of a failed machine stay in "WorkingTime" and are masked
+    # with "Machine_Failure_Counter" until the machine has recovered.
+    # ##################################################################################################################
+    """
+
+    def __init__(self, WorkingTime, TravelTime, amount_of_products, num_envs=1):
+        self.amount_of_machines = len(WorkingTime)
+        self.amount_of_products = amount_of_products
+        self.num_envs = num_envs
+
+        M, P, N = self.amount_of_machines, amount_of_products, num_envs
+
+        # "None" of the manual input is replaced by -1
+        self.skills = Capabilities.from_matrix(WorkingTime)
+        if isinstance(TravelTime, np.ndarray):
+            self.TravelTime = TravelTime.astype(np.int16)
+        else:
+            self.TravelTime = np.array([[-1 if t is None else t for t in row] for row in TravelTime], dtype=np.int16)
+
+        self.ProductDesign = np.empty((N, P, M), dtype=np.int8)
+        self.ProductBucket = np.empty((N, P), dtype=np.int16)
+        self.EstimatedTimeOfArrival = np.empty((N, P, 2), dtype=np.int16)
+        self.RemainingWorkingTime = np.empty((N, M, 3), dtype=np.int16)
+        self.Machine_Failure_Counter = np.empty((N, M), dtype=np.int16)
+        self.step = np.empty(N, dtype=np.int32)
+        self.pre_done = np.empty(N, dtype=np.int32)
+
+        self.reset()
+
+    def dynamic(self):
+        # all arrays that change during an episode
+        return (self.ProductDesign, self.ProductBucket, self.EstimatedTimeOfArrival, self.RemainingWorkingTime,
+                self.Machine_Failure_Counter, self.step, self.pre_done)
+
+    def reset(self, mask=None, ProductBucket=None):
+        """
+        # Clears all environments (or only those where "mask" is True) in place.
+        # "ProductBucket" optionally sets the starting position of the products, otherwise they start at machine 0.
+        """
+        if mask is None:
+            mask = slice(None)
+
+        self.ProductDesign[mask] = 1
+        self.ProductBucket[mask] = 0 if ProductBucket is None else ProductBucket
+        self.EstimatedTimeOfArrival[mask] = -1
+        self.RemainingWorkingTime[mask] = -1
+        self.Machine_Failure_Counter[mask] = -1
+        self.step[mask] = 0
+        self.pre_done[mask] = 0
+
+    def copy(self, out=None):
+        # Copies the state into "out" (another FactoryState of the same size) without allocating new arrays.
+        # Only if "out" is not given a new FactoryState is created.
+        if out is None:
+            out = FactoryState.__new__(FactoryState)
+            out.__dict__.update(self.__dict__)
+            for name in ("ProductDesign", "ProductBucket", "EstimatedTimeOfArrival", "RemainingWorkingTime",
+                         "Machine_Failure_Counter", "step", "pre_done"):
+                setattr(out, name, getattr(self, name).copy())
+            return out
+
+        for source, target in zip(self.dynamic(), out.dynamic()):
+            np.copyto(target, source)
+        return out
+
+    def nbytes(self):
+        # memory of the dynamic state in bytes
+        return sum(array.nbytes for array in self.dynamic())
+
+    @classmethod
+    def from_lists(cls, ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival,
+                   ProductBucket, Machine_Failure_Counter, Machine_Failure_Info):
+        # Converts one factory in the list-format of "create_factory()" into a FactoryState (num_envs = 1)
+        def fill(x):
+            return [fill(v) if isinstance(v, list) else (-1 if v is None else v) for v in x]
+
+        # skills of failed machines are stored in "Machine_Failure_Info" and have to be put back
+        WorkingTime = [Machine_Failure_Info[x] if Machine_Failure_Counter[x] is not None else WorkingTime[x]
+                       for x in range(len(WorkingTime))]
+
+        state = cls(WorkingTime, TravelTime, len(ProductBucket))
+        state.ProductDesign[0] = fill(ProductDesign)
+        state.ProductBucket[0] = fill(ProductBucket)
+        state.EstimatedTimeOfArrival[0] = fill(EstimatedTimeOfArrival)
+        state.RemainingWorkingTime[0] = fill(RemainingWorkingTime)
+        state.Machine_Failure_Counter[0] = fill(Machine_Failure_Counter)
+        return state
@@ -0,0 +1,177 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Seeded random streams of the simulators
+#
+# The simulators used to draw from the global generators ("random", "np.random"): one call per tick for the failures,
+# the results depended on everything else that used the global generators, and every worker-process had to seed them
+# by hand. "RandomStreams" gives every environment its own "numpy.random.Generator"s, derived from one root seed with
+# "numpy.random.SeedSequence", and hands out the random numbers from blocks that are drawn for many ticks at once.
+#
+# An environment only consumes its own streams, so environment e of a "VecFactory" always makes the same episodes,
+# no matter how many environments run next to it or in which process (a "Factory" with the root seed s makes the
+# same episodes as environment 0 of a "VecFactory" with the root seed s).
+# The values of a stream do not depend on the size of its blocks: every value is made from one uniform number.
+
+########################################################################################################################
+# Importing libraries
+import random  # global generator of the reference implementation
+import numpy as np  # For mathematical operations
+
+POSITIONS, FAILURES, DURATIONS, ACTIONS = range(4)  # the streams of an environment
+
+
+def sequence(seed):
+    # "SeedSequence" of an int, None (new entropy) or an existing "SeedSequence" (e.g. a child of a root seed)
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def seed_generators(seed):
+    # the global generators of random, numpy and torch (replay buffer, initial weights of the networks)
+    import torch  # only here: the simulators import this module and do not need torch
+    value = int(sequence(seed).generate_state(1)[0])
+    random.seed(value)
+    np.random.seed(value)
+    torch.manual_seed(value)
+
+
+class RowBlock:
+    # "width" values per environment and row, every environment consumes the same rows (one cursor).
+    # The block is stored row-major (rows, environments, width), so the row of a tick is one contiguous array.
+    def __init__(self, generators, rows, width, convert, dtype=np.float64):
+        self.generators = generators  # one Generator per environment, replaced by "RandomStreams.seed()"
+        self.convert = convert  # uniform numbers --> values
+        self.block = np.empty((0, len(generators), width), dtype=dtype)
+        self.rows = rows
+        self.cursor = 0
+
+    def draw(self, env, rows):
+        return self.convert(self.generators[env].random((rows, self.block.shape[2])))
+
+    def peek(self, rows):
+        # the next rows without consuming them, the block is refilled if necessary
+        if self.cursor + rows > len(self.block):
+            # the unread rows are kept, so the values are the same as with a larger block
+            remaining = self.block[self.cursor:]
+            size = max(self.rows, rows)
+            block = np.empty((size,) + self.block.shape[1:], dtype=self.block.dtype)
+            block[:len(remaining)] = remaining
+            for env in range(len(self.generators)):
+                block[len(remaining):, env] = self.draw(env, size - len(remaining))
+            self.block, self.cursor = block, 0
+        return self.block[self.cursor:self.cursor + rows]
+
+    def take(self, rows=1):
+        values = self.peek(rows)
+        self.cursor += rows
+        return values
+
+    def redraw(self, env):
+        # environment "env" got a new generator, its unread rows are drawn from it
+        self.block[self.cursor:, env] = self.draw(env, len(self.block) - self.cursor)
+
+
+class EnvBlock:
+    # values with one cursor per environment, for numbers that are only drawn by some environments
+    def __init__(self, generators, size, convert):
+        self.generators = generators
+        self.convert = convert
+        self.block = np.zeros((len(generators), size), dtype=np.int64)
+        self.cursor = np.full(len(generators), size, dtype=np.int64)  # empty
+
+    def take(self, env):
+        # one value for every entry of "env", the entries of an environment have to be consecutive and in ascending
+        # order (like "np.nonzero()" returns them)
+        env = np.asarray(env, dtype=np.int64)
+        size = self.block.shape[1]
+        rank = np.arange(len(env)) - np.searchsorted(env, env)  # rank within the environment
+        index = self.cursor[env] + rank
+        if len(env) and index.max() >= size:
+            for e in np.unique(env[index >= size]).tolist():
+                # refill of one environment, the unread values are kept
+                remaining = self.block[e, self.cursor[e]:]
+                self.block[e] = np.concatenate((remaining,
+                                                self.convert(self.generators[e].random(size - len(remaining)))))
+                self.cursor[e] = 0
+            index = self.cursor[env] + rank
+        self.cursor += np.bincount(env, minlength=len(self.generators))
+        return self.block[env, index]
+
+    def redraw(self, env):
+        self.cursor[env] = self.block.shape[1]
+
+
+class RandomStreams:
+    """
+    # ##################################################################################################################
+    # Four streams per environment, each with its own Generator (children of the seed of the environment):
+    #
+    # positions(envs)    starting position of the products (len(envs), products), drawn on reset
+    # uniforms(ticks)    one uniform number per machine and tick for the failures (ticks, num_envs, machines),
+    #                    look-ahead without consuming, "advance(ticks)" consumes them afterwards
+    # durations(env)     one duration Min_Error_Time..Max_Error_Time for every failure, "env" == environment of the
+    #                    failures in ascending order like "np.nonzero()" returns them (each environment has its own
+    #                    cursor, the number of failures differs)
+    # actions()          random action (num_envs, products) with signals -1..machines-1
+    #
+    # seed                root seed: int, None (new entropy every run) or a "SeedSequence",
+    #                     environment e gets the child e of the root seed
+    # block_size          random numbers per environment and block
+    # ##################################################################################################################
+    """
+
+    def __init__(self, num_envs, amount_of_machines, amount_of_products, Min_Error_Time, Max_Error_Time, seed=None,
+                 block_size=4096):
+        M, P = amount_of_machines, amount_of_products
+        self.amount_of_products = P
+        self.generators = [[None] * num_envs for stream in range(4)]
+
+        span = Max_Error_Time - Min_Error_Time + 1  # random.randint() includes the upper limit
+        self.blocks = [EnvBlock(self.generators[POSITIONS], max(block_size // 16, P),
+                                lambda u: (u * M).astype(np.int64)),
+                       RowBlock(self.generators[FAILURES], max(block_size // M, 1), M, lambda u: u),
+                       # at most one failure per machine and call
+                       EnvBlock(self.generators[DURATIONS], max(block_size // 16, M),
+                                lambda u: Min_Error_Time + (u * span).astype(np.int64)),
+                       RowBlock(self.generators[ACTIONS], max(block_size // P, 1), P,
+                                lambda u: (u * (M + 1)).astype(np.int64) - 1, np.int64)]
+
+        self.seed(np.arange(num_envs), sequence(seed).spawn(num_envs))
+
+    def seed(self, envs, seeds):
+        # new streams for the environments "envs", one seed (int or "SeedSequence") per environment
+        for env, seed in zip(np.asarray(envs).tolist(), seeds):
+            for stream, child in enumerate(sequence(seed).spawn(4)):
+                self.generators[stream][env] = np.random.default_rng(child)
+                self.blocks[stream].redraw(env)
+
+    def positions(self, envs):
+        envs = np.asarray(envs, dtype=np.int64)
+        return self.blocks[POSITIONS].take(np.repeat(envs, self.amount_of_products)).reshape(len(envs), -1)
+
+    def uniforms(self, ticks=1):
+        return self.blocks[FAILURES].peek(ticks)
+
+    def advance(self, ticks=1):
+        # the block holds these numbers already, "uniforms(ticks)" was called before
+        self.blocks[FAILURES].cursor += ticks
+
+    def durations(self, env):
+        return self.blocks[DURATIONS].take(env)
+
+    def actions(self):
+        return self.blocks[ACTIONS].take(1)[0]
+
+    def state_dict(self):
+        # everything to continue the streams exactly (e.g. for a checkpoint), a copy: the blocks and the cursors of
+        # "EnvBlock" are changed in place when the streams go on
+        return {'generators': [[generator.bit_generator.state for generator in stream] for stream in self.generators],
+                'blocks': [(block.block.copy(), np.copy(block.cursor) if isinstance(block.cursor, np.ndarray)
+                            else block.cursor) for block in self.blocks]}
+
+    def load_state_dict(self, state):
+        for stream, states in zip(self.generators, state['generators']):
+            for generator, generator_state in zip(stream, states):
+                generator.bit_generator.state = generator_state
+        for block, (values, cursor) in zip(self.blocks, state['blocks']):
+            block.block = np.array(values)
+            block.cursor = cursor.copy() if isinstance(cursor, np.ndarray) else int(cursor)
@@ -0,0 +1,155 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Telemetry of the training
+#
+# The training loop only records numbers: the duration of every phase (simulate, encode, infer, buffer add, update)
+# goes into a preallocated ring in memory, episodes, transitions and updates are counted.
+# A background thread aggregates the ring every "interval" seconds and publishes the metrics in the
+# Prometheus text format: written to a file (replaced atomically) and/or served over HTTP ("/metrics").
+# Nothing of this is done on the training loop itself.
+
+########################################################################################################################
+# Importing libraries
+import os  # atomic replacement of the file
+import time  # time library to get time for benchmarking
+import threading  # the aggregation runs in the background
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Prometheus-style endpoint
+import numpy as np  # For mathematical operations
+
+PHASES = ("simulate", "encode", "infer", "buffer_add", "update")
+
+
+class Telemetry:
+    """
+    # ##################################################################################################################
+    # path       file for the metrics (e.g. "metrics.prom"), None == no file
+    # port       port of the HTTP-endpoint, None == no endpoint
+    # host       address the endpoint listens on, "127.0.0.1" == only this machine, "0.0.0.0" == all interfaces
+    # interval   seconds between two aggregations
+    # capacity   number of durations in the ring (older ones are overwritten if the aggregation falls behind)
+    #
+    # record(phase, seconds)     duration of one phase
+    # count(episodes, transitions, updates)
+    #
+    # Only the training loop writes, only the background thread reads: the ring needs no lock.
+    # ##################################################################################################################
+    """
+
+    def __init__(self, path=None, port=None, interval=10.0, capacity=65536, host="127.0.0.1"):
+        self.path = path
+        self.interval = interval
+        self.phase_index = {phase: i for i, phase in enumerate(PHASES)}
+        self.phases = np.zeros(capacity, dtype=np.int8)
+        self.durations = np.zeros(capacity, dtype=np.float64)
+        self.written = 0  # number of recorded durations, only increasing
+        self.read = 0
+
+        self.episodes = 0
+        self.transitions = 0
+        self.updates = 0
+
+        # aggregated over the whole run: count, total seconds; and the last interval
+        self.total_count = np.zeros(len(PHASES), dtype=np.int64)
+        self.total_seconds = np.zeros(len(PHASES))
+        self.text = ""
+        self.started = time.perf_counter()
+        self.last = (self.started, 0, 0, 0)
+
+        self.stop = threading.Event()
+        self.thread = None
+        self.server = None
+        if port is not None:
+            self.serve(port, host)
+        if path is not None or port is not None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def record(self, phase, seconds):
+        i = self.written % len(self.durations)
+        self.phases[i] = self.phase_index[phase]
+        self.durations[i] = seconds
+        self.written += 1
+
+    def count(self, episodes=0, transitions=0, updates=0):
+        self.episodes += episodes
+        self.transitions += transitions
+        self.updates += updates
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            self.aggregate()
+        self.aggregate()
+
+    def aggregate(self):
+        # the durations since the last aggregation (at most one full ring)
+        written = self.written
+        n = min(written - self.read, len(self.durations))
+        indexes = np.arange(written - n, written) % len(self.durations)
+        phases, durations = self.phases[indexes], self.durations[indexes]
+        self.read = written
+
+        now = time.perf_counter()
+        last_time, last_episodes, last_transitions, last_updates = self.last
+        elapsed = max(now - last_time, 1e-9)
+        episodes, transitions, updates = self.episodes, self.transitions, self.updates
+        self.last = (now, episodes, transitions, updates)
+
+        lines = ["# TYPE training_phase_seconds summary"]
+        for phase, i in self.phase_index.items():
+            selected = durations[phases == i]
+            self.total_count[i] += len(selected)
+            self.total_seconds[i] += selected.sum()
+            if len(selected):
+                for quantile in (0.5, 0.9, 0.99):
+                    lines.append('training_phase_seconds{phase="%s",quantile="%s"} %.9f'
+                                 % (phase, quantile, np.quantile(selected, quantile)))
+            lines.append('training_phase_seconds_count{phase="%s"} %d' % (phase, self.total_count[i]))
+            lines.append('training_phase_seconds_sum{phase="%s"} %.9f' % (phase, self.total_seconds[i]))
+
+        lines += ["# TYPE training_episodes_total counter", "training_episodes_total %d" % episodes,
+                  "# TYPE training_transitions_total counter", "training_transitions_total %d" % transitions,
+                  "# TYPE training_updates_total counter", "training_updates_total %d" % updates,
+                  "# TYPE training_episodes_per_second gauge",
+                  "training_episodes_per_second %.6f" % ((episodes - last_episodes) / elapsed),
+                  "# TYPE training_transitions_per_second gauge",
+                  "training_transitions_per_second %.6f" % ((transitions - last_transitions) / elapsed),
+                  "# TYPE training_updates_per_second gauge",
+                  "training_updates_per_second %.6f" % ((updates - last_updates) / elapsed),
+                  "# TYPE training_uptime_seconds gauge",
+                  "training_uptime_seconds %.3f" % (now - self.started)]
+        self.text = "\n".join(lines) + "\n"
+
+        if self.path is not None:
+            temporary = self.path + ".tmp"
+            with open(temporary, "w") as file:
+                file.write(self.text)
+            os.replace(temporary, self.path)
+
+    def serve(self, port, host="127.0.0.1"):
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.text.encode() if self.path == "/metrics" else b""
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        # last aggregation, the file holds the final numbers
+        if self.thread is not None:
+            self.stop.set()
+            self.thread.join()
+            self.thread = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,447 @@
+"""
+MIT License
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Jan Nalivaika
+#
+# IG : @jannalivaika
+# YT : Jan Nalivaika
+# SC : @jannalivaika
+# LinkedIn : Jan Nalivaika
+# Mail : jan.nalivaika@siemens.com
+# Mail : nalivaika@outlook.de
+
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Training of the agent
+#
+# "train()" creates the agent, the replay buffer and the factory and runs the training loop
+# (or the actor/learner training of ActorLearner.py). Nothing is executed on import,
+# the training is started with "python MAIN.py train".
+
+########################################################################################################################
+# Importing libraries
+import os  # to check for a checkpoint
+import time  # time library to get time for benchmarking
+import logging  # level-gated output of the progress
+from Agent import TD3  # importing Agent-Class from other file
+from Buffer import ReplayBuffer, PrioritizedReplayBuffer  # importing Buffer-Classes from other file
+from Factory import Factory  # importing Factory-Class from other file
+from EventFactory import EventFactory  # importing event-driven Factory-Class from other file
+from ActorLearner import ActorLearner  # importing Actor/Learner-Training from other file
+from Actions import extract_Actions, Randomise_Action, NoiseBlock  # decoding of actions and exploration
+from Encoder import StateEncoder  # layout of the state-vector
+from Instance import configure_factory  # manually defined or generated factory
+from EpisodeLog import EpisodeLog, read_episodes, truncate_episodes  # append-only log of the episodes
+from Checkpoint import Checkpoint, resume as resume_checkpoint  # checkpoints of the training
+from Telemetry import Telemetry  # timings and throughput of the training
+from Streams import sequence, seed_generators  # seeds derived from one root seed
+
+logger = logging.getLogger(__name__)
+
+
+def Create_Agent_Parameters(amount_of_products=5, amount_of_machines=None):
+    """
+    # ##################################################################################################################
+    # The Agent-parameters only depend on the size of the factory, no factory is created for them.
+    #
+    # "state_dim" is a scalar telling the Neural-Net how many inputs are expected == Length of "state_xxx"
+    # Each input corresponds with a neuron, the layout of the state-vector is the one of "StateEncoder" (Encoder.py)
+    #
+    # The learning rate ("lr")  is how much the Action-values are changed when updating
+    #
+    # "max_action" dictates the range of activation of each neuron in the last layer
+    # It ranges from (- max_action) to (max_action)
+    #
+    # "action_dim" describes how many output neurons there are.
+    # Each product requires a signal telling what to do in the next time step.
+    # The number of output neurons is defined by the amount of products multiplied
+    # by the amount of machines plus 1. Each product cam be sent to every machine plus being injected into
+    # a machine for work.
+    # see function "extract_Actions()" in Actions.py for more specific details
+    #
+    # "exploration" is a representation of the random fluctuations introduced into the action generation.
+    # see function "Randomise_Action()" in Actions.py for more information
+    #
+    # ##################################################################################################################
+    """
+    if amount_of_machines is None:
+        # the manually defined factory (see "create_factory()")
+        amount_of_machines = len(configure_factory(amount_of_products)[0])
+
+    # Getting state dimension to create input neurons. (1 input == 1 Neuron)
+    state_dim = StateEncoder(amount_of_products, amount_of_machines).state_dim
+
+    lr = 0.00025  # Fine-tuning here ! 0,001/0.00025
+
+    max_action = 1  # Fine-tuning here ! , range of possible activation
+
+    action_dim = amount_of_products * (amount_of_machines + 1)
+
+    # See function "Randomise_Action()" for more information about the usage of "exploration"
+
+    exploration_noise_max = 0.0001  # Fine-tuning here ! 0,003
+
+    exploration_noise_min = 0.0001
+
+    exploration_noise_decay = 0.9995  # 0.995
+
+    """
+    # #########################################################################
+    # For optimal results all parameters should be fine-tuned !!
+    # #########################################################################
+    """
+    return lr, state_dim, action_dim, max_action, exploration_noise_max, exploration_noise_min, exploration_noise_decay
+
+
+def Create_Update_Parameters():
+    """
+
+    # ##################################################################################################################
+    #
+    # "gamma" describes what reward is preferred
+    # gamma = 1 only long term rewards
+    # gamma = 0 only instant short term rewards, no optimization for the future
+    #
+    #  batch_size              num of transitions sampled from replay buffer
+    #  polyak                  target policy update parameter (1-tau)
+    #  policy_noise            target policy smoothing noise
+    #  noise_clip
+    #  policy_delay            delayed policy updates parameter
+    #
+    #
+    # ##################################################################################################################
+    """
+
+    gamma = 0.99  # 0.99 discount for future rewards
+
+    batch_size = 100  # num of transitions sampled from replay buffer
+
+    """
+    It has been observed in practice that when using a larger batch there is a significant degradation
+    in the quality of the model, as measured by its ability to generalize.
+    """
+
+    polyak = 0.995
+
+    policy_noise = 0.0001
+
+    noise_clip = 0.3
+
+    policy_delay = 2
+
+    return batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay
+
+def train(max_episodes=1000000, max_timesteps=70, normalization="max", num_actors=0, load=None,
+          buffer_directory=None, prioritized=False, log="episodes.log", checkpoint="./inTraining/TD3_checkpoint.pt",
+          resume=False, telemetry=None, events=False, amount_of_products=5, amount_of_machines=None, instance_seed=0,
+          seed=None):
+    """
+    # ##################################################################################################################
+    # all Global parameters for the training-duration
+    #
+    # max_episodes      max num of episodes (USE MAX TRAINING-TIME INSTEAD)
+    # max_timesteps     max time-steps in one episode
+    # normalization     normalization of the state-vector (see Encoder.py)
+    #                   "max" == every state scaled by its own maximum (like GenerateState, the shipped agents
+    #                   were trained with it),
+    #                   "bounds" == fixed scale derived from the factory
+    # num_actors        number of actor-processes for the actor/learner training (see ActorLearner.py),
+    #                   0 == sequential training loop below
+    # load              Policy can optionally be loaded from a folder (e.g. "./perTrained" or "./inTraining")
+    # buffer_directory  Optionally the buffer is kept on disk (memory-mapped files) to exceed the RAM
+    #                   and to be reopened after a restart (e.g. "./replayBuffer")
+    # prioritized       Optionally transitions with large TD-errors (e.g. the rare completion rewards)
+    #                   are replayed more often
+    # log               every episode is appended to this file for future visualisation (see EpisodeLog.py)
+    # checkpoint        file of the checkpoint, written every 200 episodes (see Checkpoint.py)
+    # resume            the training is continued from "checkpoint" and the log is continued,
+    #                   FileNotFoundError if there is no checkpoint (a new run would overwrite the log)
+    # telemetry         "Telemetry" for the timings of the phases and the throughput (see Telemetry.py),
+    #                   None == recorded but not published
+    # events            the event-driven factory skips the time steps without a decision (see EventFactory.py)
+    # amount_of_products, amount_of_machines, instance_seed
+    #                   size of the factory, amount_of_machines None == the manually defined factory,
+    #                   otherwise a generated factory (see "configure_factory()" in Instance.py)
+    # seed              root seed of all random numbers (factory, exploration, networks, replay buffer and the
+    #                   actor-processes), the same seed repeats the same training, None == new every run
+    #
+    # Returns the rewards of all episodes
+    # ##################################################################################################################
+    """
+    # a wrong path of the checkpoint must not start a new run: that would overwrite the log of the episodes
+    if resume and not os.path.exists(checkpoint):
+        raise FileNotFoundError("no checkpoint to resume the training from: %s" % checkpoint)
+
+    store = []  # vector to store the rewards
+    # every part gets its own seed, derived from the root seed
+    factory_seed, noise_seed, global_seed, actor_seed = sequence(seed).spawn(4)
+    seed_generators(global_seed)
+    if telemetry is None:
+        telemetry = Telemetry()
+    clock = time.perf_counter
+
+    """
+    # ##################################################################################################################
+    # all Global parameters for The Agent 
+    # are set in "Create_Agent_Parameters()"
+    # May be adjusted for better performance 
+    # ##################################################################################################################
+    """
+
+    lr, state_dim, action_dim, max_action, exploration_noise_max, exploration_noise_min, exploration_noise_decay = Create_Agent_Parameters(amount_of_products, amount_of_machines)
+
+    # Policy is created
+    Policy = TD3(lr, state_dim, action_dim, max_action)
+
+    if load is not None:
+        Policy.load(load, "TD3")
+
+    # creating parameters
+    batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay = Create_Update_Parameters()
+
+    # creating replay buffer, a buffer on disk is only reopened if the training is resumed
+    buffer_arguments = dict(directory=buffer_directory, resume=resume, state_dim=state_dim, action_dim=action_dim)
+    if prioritized:
+        replay_buffer = PrioritizedReplayBuffer(**buffer_arguments)
+    else:
+        replay_buffer = ReplayBuffer(**buffer_arguments)
+
+    """
+    # ##################################################################################################################
+    #  The factory is created only once.
+    #  The static topology (WorkingTime, TravelTime) of "create_factory()" is kept as a template inside the
+    #  "Factory"-object, every episode just resets the dynamic state in place. See Factory.py
+    # ##################################################################################################################
+    """
+
+    WorkingTime, TravelTime, amount_of_products = configure_factory(amount_of_products, amount_of_machines,
+                                                                    instance_seed)
+    factory = (EventFactory if events else Factory)(WorkingTime, TravelTime, amount_of_products, max_timesteps,
+                                                    normalization=normalization, seed=factory_seed)
+
+    # pre-generated noise for the exploration (see Actions.py)
+    noise_block = NoiseBlock(action_dim, seed=noise_seed)
+
+    startingtime = time.time()
+    tage = 7
+    stunden = 0
+    minuten = 0
+    zeit = tage * 24 * 60 * 60 + stunden * 60 * 60 + minuten * 60
+    episode = 0
+
+    """
+    # ##################################################################################################################
+    # Optionally the training is continued from the last checkpoint: agent, optimizers, cursor of the replay buffer,
+    # random generators, exploration and the log of the episodes are restored.
+    # ##################################################################################################################
+    """
+    checkpointer = Checkpoint(checkpoint)
+    if resume:
+        state = resume_checkpoint(checkpoint, Policy, replay_buffer)
+        episode = state['episode']
+        exploration_noise_max = state['training']['exploration_noise_max']
+        if 'noise_block' in state['training']:  # not in a checkpoint of the actor/learner training
+            noise_block.block, noise_block.position = state['training']['noise_block'], state['training']['noise_position']
+        if 'factory_streams' in state['training']:  # not in a checkpoint from before the seeded streams
+            noise_block.generator.bit_generator.state = state['training']['noise_generator']
+            factory.streams.load_state_dict(state['training']['factory_streams'])
+        if os.path.exists(log):
+            truncate_episodes(log, episode)
+            store = read_episodes(log)['reward'].tolist()
+    episode_log = EpisodeLog(log, append=resume)
+
+    """
+    # ##################################################################################################################
+    # Optionally the episodes are simulated by "num_actors" processes while this process only learns.
+    # The sequential training loop below is skipped in that case.
+    # ##################################################################################################################
+    """
+    if num_actors > 0:
+        actor_learner = ActorLearner(Policy, replay_buffer, WorkingTime, TravelTime, amount_of_products, max_timesteps,
+                                     normalization,
+                                     (lr, state_dim, action_dim, max_action, exploration_noise_max,
+                                      exploration_noise_min, exploration_noise_decay),
+                                     (batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay),
+                                     num_actors=num_actors, episode_log=episode_log, checkpoint=checkpointer,
+                                     telemetry=telemetry, events=events, seed=actor_seed)
+        actor_learner.store = store
+        actor_learner.episode = episode
+        store = actor_learner.run(max_episodes)
+        checkpointer.wait()
+        telemetry.close()
+        episode_log.close()
+        return store
+
+    """ Optional training duration (Time/episodes)"""
+    for episode in range(episode + 1, max_episodes + 1):
+        # while startingtime + zeit > time.time():  """ALTERNATIVE TRAINING CYCLE"""
+
+        start = time.time()
+        '''
+        # ##############################################################################################################
+        #  At  first the factory has to be reset.
+        #
+        #  The position of the products is randomised, all other dynamic elements are cleared:
+        #
+        #    ProductDesign
+        #    RemainingWorkingTime
+        #    EstimatedTimeOfArrival
+        #    ProductBucket
+        #    Machine_Failure_Counter
+        #
+        #  Use of these elements is explained in their creation-functions in "create_factory()"
+        # ##############################################################################################################
+        '''
+        factory.reset()
+
+        """
+        # ##############################################################################################################
+        #  The simulation keeps running until it is done.
+        #  "done" can be defined by the user.
+        #  In this case, the factory is "done" as soon as all products have been finished.
+        #  (All necessary manufacturing steps are executed, on all individual products)
+        # ##############################################################################################################
+        """
+        # initial parameters for every game
+        step = 0
+        game_reward = 0
+
+        # random_steps_before_takeover = random.randint(0, 40)
+        random_steps_before_takeover = 10
+
+        # to generate a random starting state, some steps are performed before the Agent takes over
+        # If any steps have been performed during the execution of the random actions,
+        # the are counted, to enable the correct rewarding of the agent.
+        # Otherwise the agent might get rewarded for something that was done by random before takeover
+        factory.random_start(random_steps_before_takeover)
+        done = factory.done[0]
+
+        # (the time steps of the factory, with the event-driven factory there can be more than one per transition)
+        while not done and factory.step_count[0] < max_timesteps:
+            """
+            # ##########################################################################################################
+            # At first the machines are subjected to failure. "Induce_Failure()"
+            # Next, a action is generated that is executed on the next step
+            # This function takes into account the current state
+            # ##########################################################################################################
+            """
+
+            # A State is generated
+            # (the state-vector of the factory is reused, so a copy is kept until the transition is complete)
+            tick = clock()
+            state_prior = factory.GenerateState().copy()
+            telemetry.record("encode", clock() - tick)
+
+            # Receiving the exact output of the neural net
+            "recording the time for the Online-Reaction capability"
+            # (the online dispatching with a frozen actor and latency percentiles is in Dispatch.py)
+            # TimeToReactStart = time.time()  # recording the time for the Online-Reaction capability
+
+            tick = clock()
+            Action_raw = Policy.select_action(state_prior)
+            telemetry.record("infer", clock() - tick)
+
+            "Printing the time of reaction"
+            # print(time.time()-TimeToReactStart)  # Printing the time of reaction
+
+            # Adding exploration
+            Action_raw, exploration_noise_max = Randomise_Action(Action_raw, exploration_noise_max,
+                                                                 exploration_noise_min, exploration_noise_decay,
+                                                                 episode, noise_block)
+
+            # Extracting actions
+            Action = extract_Actions(Action_raw, factory.amount_of_products, factory.amount_of_machines)
+            # For comparison with the heuristics (random actions, linearFIFO, betterFIFO) see
+            # "compare_policies()" in Evaluation.py: python MAIN.py evaluate --policies actor betterFIFO random
+
+            """
+            # ##########################################################################################################
+            # factory_step():
+            # Here the Actions are executed.
+            # "factory.step()" executes the same phases as "factory_step()" on the state of the factory.
+            # Outputs are the reward and the "done" indicator
+            #
+            # ##########################################################################################################
+            """
+
+            tick = clock()
+            step_reward, done = factory.step(Action)
+            telemetry.record("simulate", clock() - tick)
+
+            # A new state is generated
+            tick = clock()
+            state_post = factory.GenerateState()
+            telemetry.record("encode", clock() - tick)
+
+            # ac is added to the buffer
+            tick = clock()
+            replay_buffer.add((state_prior, Action_raw, step_reward, state_post, float(done)))
+            telemetry.record("buffer_add", clock() - tick)
+
+            # Step is increased by 1
+            step += 1
+
+            # game rearward ids increased by episode reward
+            game_reward += step_reward
+
+            """
+            # ##########################################################################################################
+            # This process is repeated until "done"
+            """
+
+        # game_reward is added to the vector "store" to store the rewards
+        store.append(game_reward)
+
+        # Here is the learning process
+        tick = clock()
+        Policy.update(replay_buffer, step, batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay)
+        telemetry.record("update", clock() - tick)
+        telemetry.count(episodes=1, transitions=step, updates=step)
+
+        # Everything else just for visualization
+        # print("")
+        end = time.time()
+        duration = end - start
+
+        # All game rearwards are appended to the log for future visualisation
+        episode_log.write(episode, game_reward, step, duration, exploration_noise_max,
+                          (factory.ProductDesign[0] == -1).sum())
+
+        if episode % 200 == 0:
+            # every 200th episode the learning progress is saved in one checkpoint (written in the background)
+            replay_buffer.flush()
+            episode_log.flush()
+            checkpointer.save(Policy, replay_buffer, episode, exploration_noise_max=exploration_noise_max,
+                              noise_block=noise_block.block, noise_position=noise_block.position,
+                              noise_generator=noise_block.generator.bit_generator.state,
+                              factory_streams=factory.streams.state_dict())
+
+        logger.info("Episode: %d\tAverage Reward: %s\t Explore: %s\t Time: %s", episode, game_reward,
+                    exploration_noise_max, duration)
+
+        # Printing the matrix for visual support of progress (only at the level DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n%s\n", factory.ProductDesign[0])
+
+    checkpointer.wait()
+    telemetry.close()
+    episode_log.close()
+    return store
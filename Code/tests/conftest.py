@@ -0,0 +1,26 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Shared fixtures of the tests
+#
+# The modules live flat in Code/, the tests import them like MAIN.py does.
+# Run from Code/:  python -m pytest -q tests
+
+########################################################################################################################
+# Importing libraries
+import os  # path of the modules
+import sys  # import path of the modules
+import random  # seed of "create_factory()"
+import numpy as np  # For mathematical operations
+import pytest  # fixtures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Environment import create_factory  # reference implementation of the factory
+
+
+@pytest.fixture
+def manual_factory():
+    # the manually defined factory of "create_factory()" in the list-format, with a fixed ProductBucket
+    random.seed(0)
+    np.random.seed(0)
+    return create_factory()
@@ -0,0 +1,31 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Encoder bounds
+#
+# With the "bounds"-normalization every element of the state-vector stays within [-1, +1] and the sentinel -1
+# (no product, no failure, ...) is always encoded as -1
+
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Simulator import VecFactory  # batched simulator
+from Instance import configure_factory  # manually defined or generated factory
+
+FAILURES = {"Failure_Prob": 0.2, "Min_Error_Time": 2, "Max_Error_Time": 9}
+
+
+@pytest.mark.parametrize("amount_of_products, amount_of_machines, seed", ((5, None, 0), (8, 12, 1), (10, 30, 2)))
+def test_bounds_keep_the_state_within_one(amount_of_products, amount_of_machines, seed):
+    WorkingTime, TravelTime, P = configure_factory(amount_of_products, amount_of_machines, seed=seed)
+    factory = VecFactory(WorkingTime, TravelTime, P, 8, 40, normalization="bounds", seed=seed, **FAILURES)
+    for step in range(400):
+        factory.step(factory.GenerateRandomAction())
+        factory.reset(factory.done | (factory.step_count >= 40))
+        state = factory.GenerateState()
+        assert state.min() >= -1 and state.max() <= 1
+        np.testing.assert_array_equal(state[factory.encoder.raw == -1], -1)
+
+
+def test_default_normalization_is_max():
+    # the shipped agents were trained with the "max"-normalization
+    WorkingTime, TravelTime, P = configure_factory(5)
+    assert VecFactory(WorkingTime, TravelTime, P, 2, 40, seed=0).encoder.normalization == "max"
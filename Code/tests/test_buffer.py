@@ -0,0 +1,41 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Replay buffer on disk
+#
+# A buffer in a directory is only reopened when the training is resumed, with the same dimensions
+
+import numpy as np  # For mathematical operations
+import pytest  # expected exceptions
+from Buffer import ReplayBuffer, PrioritizedReplayBuffer  # buffers under test
+
+
+def fill(buffer, n, state_dim=4, action_dim=3):
+    rows = np.arange(n, dtype=np.float32)[:, None]
+    buffer.add_batch(np.repeat(rows, state_dim, 1), np.repeat(rows, action_dim, 1), rows[:, 0],
+                     np.repeat(rows + 1, state_dim, 1), np.zeros(n, dtype=np.float32))
+    buffer.flush()
+
+
+@pytest.mark.parametrize("Buffer", (ReplayBuffer, PrioritizedReplayBuffer))
+def test_resume_reopens_the_transitions(tmp_path, Buffer):
+    fill(Buffer(max_size=16, directory=str(tmp_path)), 20)
+    buffer = Buffer(max_size=16, directory=str(tmp_path), resume=True, state_dim=4, action_dim=3)
+    assert (buffer.ptr, len(buffer)) == (4, 16)
+    np.testing.assert_array_equal(buffer.reward[:4], [16, 17, 18, 19])
+
+
+def test_new_run_starts_empty(tmp_path):
+    fill(ReplayBuffer(max_size=16, directory=str(tmp_path)), 10)
+    buffer = ReplayBuffer(max_size=16, directory=str(tmp_path))
+    assert len(buffer) == 0 and buffer.state is None
+    fill(buffer, 3)
+    assert len(ReplayBuffer(max_size=16, directory=str(tmp_path), resume=True)) == 3
+    # without transitions of the new run nothing is reopened
+    ReplayBuffer(max_size=16, directory=str(tmp_path))
+    assert len(ReplayBuffer(max_size=16, directory=str(tmp_path), resume=True)) == 0
+
+
+def test_resume_with_other_dimensions_raises(tmp_path):
+    fill(ReplayBuffer(max_size=16, directory=str(tmp_path)), 5)
+    with pytest.raises(ValueError, match="state_dim"):
+        ReplayBuffer(max_size=16, directory=str(tmp_path), resume=True, state_dim=5, action_dim=3)
@@ -0,0 +1,106 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Checkpoint round-trip
+#
+# A resumed training continues exactly where the checkpoint was written: networks, optimizers, the cursor and the
+# priorities of the replay buffer, the random generators and the random streams of the factory
+
+import logging  # warning of the replay buffer
+import random  # global generator
+import pytest  # expected exceptions
+import numpy as np  # For mathematical operations
+import torch  # for the networks
+from Agent import TD3, load_actor_state_dict  # agent under test
+from Buffer import PrioritizedReplayBuffer  # buffer with a state of its own
+from Checkpoint import Checkpoint, resume  # checkpoint under test
+from Factory import Factory  # random streams of the factory
+from Instance import configure_factory  # manually defined factory
+from Trainer import train  # resume of the training
+
+STATE_DIM, ACTION_DIM = 6, 4
+UPDATE = (8, 0.99, 0.995, 0.2, 0.5, 2)  # batch_size, gamma, polyak, policy_noise, noise_clip, policy_delay
+
+
+def training(directory, resume_buffer=False):
+    Policy = TD3(1e-3, STATE_DIM, ACTION_DIM, 1)
+    replay_buffer = PrioritizedReplayBuffer(max_size=64, directory=directory, resume=resume_buffer,
+                                            state_dim=STATE_DIM, action_dim=ACTION_DIM)
+    return Policy, replay_buffer
+
+
+def fill(replay_buffer, n):
+    rng = np.random.default_rng(len(replay_buffer))
+    replay_buffer.add_batch(rng.uniform(-1, 1, (n, STATE_DIM)), rng.uniform(-1, 1, (n, ACTION_DIM)),
+                            rng.uniform(-1, 0, n), rng.uniform(-1, 1, (n, STATE_DIM)), np.zeros(n))
+
+
+def continuation(Policy, replay_buffer, streams):
+    # everything the training does after the checkpoint
+    fill(replay_buffer, 10)
+    Policy.update(replay_buffer, 3, *UPDATE)
+    return ([p.detach().clone() for p in Policy.actor.parameters()], replay_buffer.tree.tree.copy(),
+            streams.uniforms(50).copy(), streams.actions().copy(), random.random(), np.random.random(), torch.rand(1))
+
+
+def test_resume_continues_exactly(tmp_path):
+    torch.manual_seed(0)
+    np.random.seed(0)
+    random.seed(0)
+    WorkingTime, TravelTime, P = configure_factory(5)
+    factory = Factory(WorkingTime, TravelTime, P, 70, seed=0, Failure_Prob=0.1)
+    Policy, replay_buffer = training(str(tmp_path / "buffer"))
+    fill(replay_buffer, 30)
+    Policy.update(replay_buffer, 5, *UPDATE)
+    for step in range(15):
+        factory.step(factory.GenerateRandomAction())
+
+    checkpoint = Checkpoint(str(tmp_path / "TD3_checkpoint.pt"))
+    checkpoint.save(Policy, replay_buffer, 7, factory_streams=factory.streams.state_dict())
+    checkpoint.wait()
+    replay_buffer.flush()
+    expected = continuation(Policy, replay_buffer, factory.streams)
+
+    # a new process: new networks, the buffer reopened from disk, other random numbers
+    torch.manual_seed(1)
+    np.random.seed(1)
+    random.seed(1)
+    restored, reopened = training(str(tmp_path / "buffer"), resume_buffer=True)
+    state = resume(checkpoint.path, restored, reopened)
+    assert state['episode'] == 7
+    # the transitions written after the checkpoint are overwritten again, the cursor comes from the checkpoint
+    assert (reopened.ptr, len(reopened)) == (30, 30)
+
+    factory = Factory(WorkingTime, TravelTime, P, 70, seed=5, Failure_Prob=0.1)
+    factory.streams.load_state_dict(state['training']['factory_streams'])
+    actual = continuation(restored, reopened, factory.streams)
+
+    for a, b in zip(expected[0], actual[0]):
+        torch.testing.assert_close(a, b)
+    for a, b in zip(expected[1:4], actual[1:4]):
+        np.testing.assert_array_equal(a, b)
+    assert expected[4:6] == actual[4:6]
+    torch.testing.assert_close(expected[6], actual[6])
+
+    # the optimizers are part of the checkpoint
+    assert restored.actor_optimizer.state_dict()['state'].keys() == Policy.actor_optimizer.state_dict()['state'].keys()
+    # "load_actor()" prefers the checkpoint to the separate files
+    for key, value in load_actor_state_dict(str(tmp_path), "TD3").items():
+        torch.testing.assert_close(value, state['agent']['actor'][key])
+
+
+def test_resume_without_checkpoint_keeps_the_log(tmp_path):
+    log = tmp_path / "episodes.log"
+    log.write_text("history of an earlier run\n")
+    with pytest.raises(FileNotFoundError):
+        train(1, log=str(log), checkpoint=str(tmp_path / "typo_checkpoint.pt"), resume=True)
+    assert log.read_text() == "history of an earlier run\n"
+
+
+def test_buffer_in_memory_warns_on_resume(caplog):
+    Policy, replay_buffer = training(None)
+    fill(replay_buffer, 5)
+    state_dict = replay_buffer.state_dict()
+    empty = training(None)[1]
+    with caplog.at_level(logging.WARNING, logger="Buffer"):
+        empty.load_state_dict(state_dict)
+    assert len(empty) == 0 and "starts empty" in caplog.text
@@ -0,0 +1,55 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Incremental state encoder
+#
+# StateEncoder: the state-vector that is updated with every write equals a vector built from the complete state
+
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Encoder import StateEncoder  # encoder under test
+from Simulator import VecFactory  # batched simulator
+from Factory import Factory  # single factory
+from EventFactory import EventFactory  # event-driven factory
+from Instance import configure_factory  # manually defined or generated factory
+
+FAILURES = {"Failure_Prob": 0.1, "Min_Error_Time": 2, "Max_Error_Time": 6}
+
+
+def reloaded(factory, normalization):
+    encoder = StateEncoder(factory.amount_of_products, factory.amount_of_machines, factory.num_envs, normalization)
+    encoder.set_bounds(factory.skills.max_time(), int(factory.TravelTime.max()), factory.Max_Error_Time)
+    encoder.load(factory.state)
+    return encoder
+
+
+@pytest.mark.parametrize("normalization", ("max", "bounds"))
+def test_incremental_writes_match_a_reload(normalization):
+    WorkingTime, TravelTime, P = configure_factory(5)
+    factory = VecFactory(WorkingTime, TravelTime, P, 8, 30, normalization=normalization, seed=0, **FAILURES)
+    for step in range(300):
+        factory.step(factory.GenerateRandomAction())
+        factory.reset(factory.done | (factory.step_count >= 30))  # partial resets
+        encoder = reloaded(factory, normalization)
+        np.testing.assert_array_equal(factory.encoder.raw, encoder.raw)
+        np.testing.assert_array_equal(factory.GenerateState(), encoder.GenerateState())
+
+
+@pytest.mark.parametrize("simulator", (Factory, EventFactory))
+def test_single_factories_keep_the_vector_up_to_date(simulator):
+    WorkingTime, TravelTime, P = configure_factory(8, 12, seed=1)
+    factory = simulator(WorkingTime, TravelTime, P, 40, seed=1, **FAILURES)
+    rng = np.random.default_rng(1)
+    for step in range(300):
+        reward, done = factory.step(rng.integers(-1, factory.amount_of_machines, P))
+        if done or factory.step_count[0] >= 40:
+            factory.reset()
+        np.testing.assert_array_equal(factory.encoder.raw, reloaded(factory, "max").raw)
+
+
+def test_layout():
+    encoder = StateEncoder(3, 4)
+    assert encoder.state_dim == 3 * 4 + 3 + 3 * 2 + 4 * 3 + 4
+    encoder.write("Machine_Failure_Counter", (0, 2), 10)
+    assert encoder.raw[0, encoder.offsets["Machine_Failure_Counter"][0] + 2] == 2  # divided by 5
+    encoder.write("RemainingWorkingTime", (0, 1, 1), 7)
+    assert encoder.raw[0, encoder.offsets["RemainingWorkingTime"][0] + 1 * 3 + 1] == 7
@@ -0,0 +1,57 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Event-driven factory
+#
+# "EventFactory" jumps over the time steps without a decision. Replayed tick by tick on a "Factory" with the same
+# seed, the same decisions give the same states and rewards, and the skipped ticks have nothing to decide and no reward
+
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Factory import Factory  # tick model
+from EventFactory import EventFactory  # event model under test
+from Instance import configure_factory  # manually defined factory
+
+PARAMETERS = ({}, {"Failure_Prob": 0.0}, {"Failure_Prob": 0.2, "Min_Error_Time": 2, "Max_Error_Time": 6})
+
+
+def decisions(configuration, seed, parameters):
+    # the episode of the event model: (time, state, reward, Action) of every decision
+    factory = EventFactory(*configuration, 70, **parameters)
+    factory.reset(seed)
+    factory.random_start(10)
+    rng = np.random.default_rng(seed)
+    log = [(factory.time, factory.GenerateState().copy(), None, None)]
+    done = factory.done[0]
+    while not done and factory.step_count[0] < 70:
+        Action = rng.integers(-1, factory.amount_of_machines, configuration[2])
+        reward, done = factory.step(Action)
+        log.append((factory.time, factory.GenerateState().copy(), reward, Action))
+    return log
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS)
+@pytest.mark.parametrize("seed", range(20))
+def test_event_model_matches_the_tick_model(parameters, seed):
+    configuration = configure_factory(5)
+    log = decisions(configuration, seed, parameters)
+
+    factory = Factory(*configuration, 70, **parameters)
+    factory.reset(seed)
+    factory.random_start(10)
+    idle = np.random.default_rng(99)  # any action on a tick without a decision
+    tick = 10
+    while tick < log[0][0]:
+        factory.step(idle.integers(-1, factory.amount_of_machines, configuration[2]))
+        tick += 1
+    np.testing.assert_allclose(factory.GenerateState(), log[0][1])
+
+    for time, state, reward, Action in log[1:]:
+        tick_reward, done = factory.step(Action)
+        tick += 1
+        while tick < time:
+            assert not (factory.ProductBucket[0] >= 0).any()
+            skipped_reward, done = factory.step(idle.integers(-1, factory.amount_of_machines, configuration[2]))
+            tick += 1
+            assert skipped_reward == 0
+        assert tick_reward == reward
+        np.testing.assert_allclose(factory.GenerateState(), state)
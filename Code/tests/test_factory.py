@@ -0,0 +1,73 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Single factory
+#
+# Factory (scalar phases of the single environment) makes the same episodes as VecFactory and factory_step()
+
+import copy  # independent copy of the reference factory
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Environment import factory_step, GenerateState  # reference implementation of the factory
+from Simulator import VecFactory  # batched simulator
+from Factory import Factory  # simulator under test
+
+pytestmark = pytest.mark.filterwarnings("ignore::PendingDeprecationWarning")
+
+FAILURES = {"Failure_Prob": 0.1, "Min_Error_Time": 2, "Max_Error_Time": 6}  # many short failures
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_factory_matches_vecfactory(manual_factory, seed):
+    WorkingTime, TravelTime, P = manual_factory[1], manual_factory[2], len(manual_factory[5])
+    factory = Factory(WorkingTime, TravelTime, P, 30, seed=seed, **FAILURES)
+    vectorized = VecFactory(WorkingTime, TravelTime, P, 1, 30, seed=seed, **FAILURES)
+    rng = np.random.default_rng(seed)
+
+    for step in range(400):
+        Action = rng.integers(-1, factory.amount_of_machines, P)
+        reward, done = factory.step(Action)
+        vectorized_reward, vectorized_done = vectorized.step(Action[None])
+        assert reward == vectorized_reward[0]
+        assert done == vectorized_done[0]
+        np.testing.assert_array_equal(factory.GenerateState(), vectorized.GenerateState()[0])
+        for a, b in zip(factory.state.dynamic(), vectorized.state.dynamic()):
+            np.testing.assert_array_equal(a, b)
+
+        if done or factory.step_count[0] >= 30:
+            factory.reset()
+            vectorized.reset(np.ones(1, dtype=bool))
+
+
+def test_factory_matches_factory_step(monkeypatch, manual_factory):
+    monkeypatch.setattr(np.random, "uniform", lambda *args, **kwargs: 1.0)  # no failure in the reference
+    reference = list(copy.deepcopy(manual_factory))
+    WorkingTime, TravelTime, P = reference[1], reference[2], len(reference[5])
+    factory = Factory(WorkingTime, TravelTime, P, 70, Failure_Prob=0.0)
+    factory.state.reset(ProductBucket=np.array(reference[5]))
+    factory.encoder.load(factory.state)
+    rng = np.random.default_rng(0)
+
+    for step in range(70):
+        Action = rng.integers(-1, factory.amount_of_machines, P)
+        reward, done = factory.step(Action)
+        (reference[0], reference[3], reference[4], reference[5], reference_reward,
+         reference[6]) = factory_step(*reference[:7], *reference[8:], Action.tolist(), step, 70, 0)
+        assert reward == reference_reward
+        assert done == reference[6]
+        np.testing.assert_allclose(factory.GenerateState(), GenerateState(*reference[:7], *reference[8:]), atol=1e-6)
+
+
+def test_reset_clears_the_state_in_place(manual_factory):
+    factory = Factory(manual_factory[1], manual_factory[2], len(manual_factory[5]), 70, seed=0, **FAILURES)
+    arrays = [id(array) for array in factory.state.dynamic()] + [id(factory.encoder.raw)]
+    factory.random_start(40)
+    factory.reset()
+
+    assert arrays == [id(array) for array in factory.state.dynamic()] + [id(factory.encoder.raw)]
+    assert (factory.ProductDesign == 1).all()
+    assert (factory.RemainingWorkingTime == -1).all() and (factory.Machine_Failure_Counter == -1).all()
+    assert factory.step_count[0] == 0 and not factory.done[0]
+    fresh = Factory(manual_factory[1], manual_factory[2], len(manual_factory[5]), 70)
+    fresh.state.reset(ProductBucket=factory.ProductBucket[0])
+    fresh.encoder.load(fresh.state)
+    np.testing.assert_array_equal(factory.GenerateState(), fresh.GenerateState())
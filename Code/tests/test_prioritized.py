@@ -0,0 +1,67 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Prioritized replay
+#
+# The SumTree finds the same transitions as a cumulative sum of the priorities and the importance-sampling weights
+# are (N * P(i)) ** -beta, normalized by the largest weight
+
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Buffer import SumTree, PrioritizedReplayBuffer  # prioritized replay under test
+
+
+@pytest.mark.parametrize("capacity", (1, 5, 16, 1000))
+def test_sumtree_matches_the_cumulative_sum(capacity):
+    rng = np.random.default_rng(capacity)
+    tree = SumTree(capacity)
+    priorities = np.zeros(capacity)
+    for round in range(5):
+        indexes = rng.choice(capacity, size=max(capacity // 3, 1), replace=False)
+        priorities[indexes] = rng.uniform(0.1, 2, len(indexes))
+        tree.update(indexes, priorities[indexes])
+
+        assert tree.total() == pytest.approx(priorities.sum())
+        np.testing.assert_allclose(tree.get(np.arange(capacity)), priorities)
+        values = rng.uniform(0, priorities.sum(), 200)
+        np.testing.assert_array_equal(tree.find(values), np.searchsorted(np.cumsum(priorities), values))
+
+
+def test_importance_sampling_weights():
+    buffer = PrioritizedReplayBuffer(max_size=64, beta=0.5, beta_increment=0.1)
+    n = 40
+    buffer.add_batch(np.zeros((n, 4)), np.zeros((n, 3)), np.zeros(n), np.zeros((n, 4)), np.zeros(n))
+    td_errors = np.linspace(0, 5, n)
+    buffer.update_priorities(np.arange(n), td_errors)
+
+    priorities = (td_errors + buffer.epsilon) ** buffer.alpha
+    np.random.seed(0)
+    *transitions, indexes, sample_weights = buffer.sample(32)
+    probabilities = priorities[indexes] / priorities.sum()
+    weights = (n * probabilities) ** -0.5
+    np.testing.assert_allclose(sample_weights, weights / weights.max(), rtol=1e-5)
+    assert buffer.beta == pytest.approx(0.6)
+    # the empty part of the tree (capacity 64, 40 transitions) is never sampled
+    assert indexes.max() < n
+    assert len(transitions) == 5 and len(transitions[0]) == 32
+
+
+def test_new_transitions_get_the_highest_priority():
+    buffer = PrioritizedReplayBuffer(max_size=8)
+    buffer.add_batch(np.zeros((4, 2)), np.zeros((4, 1)), np.zeros(4), np.zeros((4, 2)), np.zeros(4))
+    buffer.update_priorities(np.arange(4), np.array([0, 1, 3, 0.5]))
+    buffer.add((np.zeros(2), np.zeros(1), 0, np.zeros(2), 0))
+    assert buffer.tree.get([4])[0] == pytest.approx(buffer.max_priority)
+    assert buffer.max_priority == pytest.approx(buffer.tree.get([2])[0])
+
+
+def test_add_batch_larger_than_the_buffer():
+    # only the last max_size transitions are kept, each one once
+    buffer = PrioritizedReplayBuffer(max_size=8)
+    buffer.add_batch(np.zeros((3, 2)), np.zeros((3, 1)), np.zeros(3), np.zeros((3, 2)), np.zeros(3))
+    reward = np.arange(20, dtype=np.float32)
+    indexes = buffer.add_batch(np.zeros((20, 2)), np.zeros((20, 1)), reward, np.zeros((20, 2)), np.zeros(20))
+    assert len(np.unique(indexes)) == 8
+    assert (buffer.ptr, len(buffer)) == ((3 + 20) % 8, 8)
+    # in the order of the ring: the oldest transition is at the write cursor
+    np.testing.assert_array_equal(np.roll(buffer.reward, -buffer.ptr), reward[-8:])
+    assert buffer.tree.total() == pytest.approx(8 * buffer.max_priority)
@@ -0,0 +1,77 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Shared-memory ring
+#
+# The transitions of a "TransitionRing" reach the replay buffer in the order they were written, also across the
+# wrap-around at the end of the ring
+
+import threading  # reader next to the writer
+import numpy as np  # For mathematical operations
+from SharedRing import TransitionRing  # ring under test
+from Buffer import ReplayBuffer  # reader target
+
+
+def transitions(first, n, state_dim, action_dim):
+    index = np.arange(first, first + n, dtype=np.float32)[:, None]
+    return (np.repeat(index, state_dim, 1), np.repeat(-index, action_dim, 1), index[:, 0] * 10,
+            np.repeat(index + 0.5, state_dim, 1), (index[:, 0] % 2 == 0).astype(np.float32))
+
+
+def test_wrap_around():
+    state_dim, action_dim, capacity = 3, 2, 8
+    ring = TransitionRing(state_dim, action_dim, capacity, create=True)
+    reader = TransitionRing(state_dim, action_dim, capacity, name=ring.name)  # like an actor-process
+    try:
+        replay_buffer = ReplayBuffer(max_size=100)
+        written = 0
+        for n in (5, 6, 8, 3, 7, 1, 8):  # every write but the first crosses or ends at the end of the ring
+            assert reader.put(*transitions(written, n, state_dim, action_dim))
+            written += n
+            assert ring.drain(replay_buffer) == n
+            assert ring.drain(replay_buffer) == 0
+
+        expected = transitions(0, written, state_dim, action_dim)
+        stored = (replay_buffer.state, replay_buffer.action, replay_buffer.reward, replay_buffer.next_state,
+                  replay_buffer.done)
+        for column, values in zip(stored, expected):
+            np.testing.assert_array_equal(column[:written], values)
+        assert int(ring.header[0]) == int(ring.header[1]) == written
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_full_ring_returns_when_stopped():
+    class Stop:
+        def is_set(self):
+            return True
+
+    ring = TransitionRing(2, 1, 4, create=True)
+    try:
+        assert ring.put(*transitions(0, 4, 2, 1))
+        assert not ring.put(*transitions(4, 1, 2, 1), stop=Stop())
+    finally:
+        ring.close()
+
+
+def test_more_transitions_than_the_ring_holds():
+    # an episode longer than the ring is written in parts while the learner drains it
+    state_dim, action_dim, capacity, n = 3, 2, 8, 45
+    ring = TransitionRing(state_dim, action_dim, capacity, create=True)
+    replay_buffer = ReplayBuffer(max_size=100)
+    finished = threading.Event()
+
+    def learner():
+        while not finished.is_set() or int(ring.header[0]) > int(ring.header[1]):
+            ring.drain(replay_buffer)
+
+    reader = threading.Thread(target=learner)
+    reader.start()
+    try:
+        assert ring.put(*transitions(0, n, state_dim, action_dim))
+    finally:
+        finished.set()
+        reader.join(timeout=10)
+        ring.close()
+    assert len(replay_buffer) == n
+    np.testing.assert_array_equal(replay_buffer.reward[:n], transitions(0, n, state_dim, action_dim)[2])
@@ -0,0 +1,85 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Batched simulator against the reference
+#
+# VecFactory follows the rules of "factory_step()" exactly. Both get the same failure draws: the random numbers of
+# the failures (one uniform number per machine and tick, one duration per failure) are injected into both.
+
+import copy  # independent copies of the reference factory
+import random  # duration of a failure in the reference
+from collections import deque  # durations of the failures of one environment
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Environment import factory_step, GenerateState  # reference implementation of the factory
+from Simulator import VecFactory  # simulator under test
+
+# "GenerateState()" of the reference uses np.matrix
+pytestmark = pytest.mark.filterwarnings("ignore::PendingDeprecationWarning")
+
+
+def reference_state(factory):
+    ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival, ProductBucket, done, score, Machine_Failure_Counter, Machine_Failure_Info = factory
+    return GenerateState(ProductDesign, WorkingTime, TravelTime, RemainingWorkingTime, EstimatedTimeOfArrival,
+                         ProductBucket, done, Machine_Failure_Counter, Machine_Failure_Info)
+
+
+class InjectedStreams:
+    # the failure draws of the test instead of the random streams of the factory (see Streams.py)
+    def __init__(self, uniforms, durations):
+        self.rows = uniforms  # (ticks, num_envs, machines)
+        self.tick = 0
+        self.queues = [deque(queue) for queue in durations]  # per environment
+
+    def uniforms(self, ticks=1):
+        return self.rows[self.tick:self.tick + ticks]
+
+    def advance(self, ticks=1):
+        self.tick += ticks
+
+    def durations(self, env):
+        return np.array([self.queues[e].popleft() for e in np.asarray(env).tolist()], dtype=np.int64)
+
+
+@pytest.mark.parametrize("failures", (False, True))
+@pytest.mark.parametrize("seed", range(5))
+def test_vecfactory_matches_factory_step(monkeypatch, manual_factory, seed, failures):
+    rng = np.random.default_rng(seed)
+    num_envs, max_timesteps = 4, 70
+    WorkingTime, TravelTime, P = manual_factory[1], manual_factory[2], len(manual_factory[5])
+    M = len(WorkingTime)
+
+    # the reference fails a machine for 40..70 ticks with a probability of 0.025 (see "Induce_Failure()"):
+    # here about every fourth empty machine fails, so failures, repairs and the masking of failed machines happen
+    if failures:
+        uniforms = rng.uniform(0, 0.1, (max_timesteps, num_envs, M))
+    else:
+        uniforms = np.ones((max_timesteps, num_envs, M))
+    durations = rng.integers(40, 71, (num_envs, max_timesteps * M)).tolist()
+    queues = [deque(queue) for queue in durations]
+
+    # every environment starts from its own reference factory
+    references = [list(copy.deepcopy(manual_factory)) for env in range(num_envs)]
+    for reference in references:
+        reference[5] = rng.integers(0, M, P).tolist()
+    factory = VecFactory(WorkingTime, TravelTime, P, num_envs, max_timesteps, Failure_Prob=0.025, Min_Error_Time=40,
+                         Max_Error_Time=70)
+    factory.streams = InjectedStreams(uniforms, durations)
+    factory.state.reset(ProductBucket=np.array([reference[5] for reference in references]))
+    factory.encoder.load(factory.state)
+
+    failed = 0
+    for step in range(max_timesteps):
+        Action = rng.integers(-1, M, (num_envs, P))
+        reward, done = factory.step(Action)
+        state = factory.GenerateState()
+        failed += int((factory.Machine_Failure_Counter >= 0).sum())
+        for env, reference in enumerate(references):
+            draws = iter(uniforms[step, env].tolist())
+            monkeypatch.setattr(np.random, "uniform", lambda *args, **kwargs: next(draws))
+            monkeypatch.setattr(random, "randint", lambda *args, **kwargs: queues[env].popleft())
+            (reference[0], reference[3], reference[4], reference[5], reference_reward,
+             reference[6]) = factory_step(*reference[:7], *reference[8:], Action[env].tolist(), step, max_timesteps, 0)
+            assert reward[env] == reference_reward
+            assert done[env] == reference[6]
+            np.testing.assert_allclose(state[env], reference_state(reference), atol=1e-6)
+    assert (failed > 0) == failures
@@ -0,0 +1,89 @@
+# PRODUCTION FLOW-CONTROL IN A CELL-BASED MANUFACTURING ENVIRONMENT
+#
+# Seeded random streams
+#
+# Environment e of a "VecFactory" only consumes its own streams: a "Factory" with the root seed s makes the same
+# episodes as environment 0 of a "VecFactory" with the root seed s, no matter how large the blocks of random numbers
+# are, and the streams can be saved and continued exactly
+
+import os  # path of the package
+import subprocess  # clean interpreter
+import sys  # current interpreter
+import numpy as np  # For mathematical operations
+import pytest  # parametrized tests
+from Factory import Factory  # single factory
+from Simulator import VecFactory  # batched simulator
+from Streams import RandomStreams  # streams under test
+from Instance import configure_factory  # manually defined factory
+
+FAILURES = {"Failure_Prob": 0.1, "Min_Error_Time": 3, "Max_Error_Time": 9}
+
+
+def states(factory, steps=300, episode=50):
+    # the state-vector of environment 0 after every step, all environments are reset every "episode" steps
+    vector = []
+    for step in range(steps):
+        factory.step(factory.GenerateRandomAction())
+        vector.append(np.asarray(factory.GenerateState()).reshape(factory.num_envs, -1)[0].copy())
+        if step % episode == episode - 1:
+            factory.reset()
+    return np.array(vector)
+
+
+def single(seed, block_size=None):
+    WorkingTime, TravelTime, P = configure_factory(5)
+    factory = Factory(WorkingTime, TravelTime, P, 10 ** 6, seed=seed, **FAILURES)
+    if block_size is not None:
+        factory.streams = RandomStreams(1, factory.amount_of_machines, P, FAILURES["Min_Error_Time"],
+                                        FAILURES["Max_Error_Time"], seed, block_size)
+        factory.reset()
+    return factory
+
+
+@pytest.mark.parametrize("num_envs", (1, 16))
+def test_factory_is_environment_zero_of_vecfactory(num_envs):
+    WorkingTime, TravelTime, P = configure_factory(5)
+    batched = VecFactory(WorkingTime, TravelTime, P, num_envs, 10 ** 6, seed=7, **FAILURES)
+    np.testing.assert_array_equal(states(single(7)), states(batched))
+
+
+@pytest.mark.parametrize("block_size", (1, 37, 100000))
+def test_block_size_does_not_change_the_numbers(block_size):
+    np.testing.assert_array_equal(states(single(7)), states(single(7, block_size)))
+
+
+def test_other_seed_other_episodes():
+    assert not np.array_equal(states(single(7)), states(single(8)))
+
+
+def test_reset_seed_is_independent_of_the_root_seed():
+    runs = []
+    for root in (1, 2):
+        factory = single(root)
+        factory.reset(5)
+        factory.random_start(10)
+        runs.append(states(factory, 60, 1000))
+    np.testing.assert_array_equal(*runs)
+
+
+def test_state_dict_continues_the_streams():
+    factory = single(3)
+    states(factory, 40)
+    saved = factory.streams.state_dict()
+    expected = (factory.streams.uniforms(500).copy(), factory.streams.actions().copy(),
+                factory.streams.durations(np.zeros(50, dtype=np.int64)).copy(), factory.streams.positions([0]).copy())
+
+    restored = single(11).streams
+    restored.load_state_dict(saved)
+    actual = (restored.uniforms(500), restored.actions(), restored.durations(np.zeros(50, dtype=np.int64)),
+              restored.positions([0]))
+    for a, b in zip(expected, actual):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_simulators_do_not_import_torch():
+    # the streams seed torch only on request: importing a simulator must not load torch
+    code = "import sys, Factory, Simulator, EventFactory; print('torch' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"